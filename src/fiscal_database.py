@@ -1,11 +1,501 @@
 import sqlite3
 import json
-from typing import Dict, List, Optional, Any
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SCHEMA_VERSION = 5
+
+# Configuração aplicada a cada conexão: WAL permite leituras concorrentes à
+# escrita e cache/mmap maiores mantêm as páginas quentes em memória
+_CONNECTION_PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA cache_size = -65536;
+PRAGMA mmap_size = 268435456;
+PRAGMA temp_store = MEMORY;
+"""
+
+# Tamanho do cache LRU de statements preparados por conexão
+_CACHED_STATEMENTS = 256
+
+# Margem abaixo do SQLITE_MAX_VARIABLE_NUMBER padrão (999) para cláusulas IN
+_MAX_SQL_PARAMS = 900
+
+# v3: impostos totais desnormalizados (e índice do dashboard refeito sobre eles)
+_MIGRATION_IMPOSTOS_TOTAIS_SQL = """
+ALTER TABLE notas_fiscais ADD COLUMN valor_impostos_totais REAL;
+UPDATE notas_fiscais
+SET valor_impostos_totais = valor_icms + COALESCE(valor_pis, 0) + COALESCE(valor_cofins, 0);
+DROP INDEX IF EXISTS idx_nf_dash;
+"""
+
+_INSERT_PRODUTO_SQL = """
+    INSERT INTO produtos (
+        nota_fiscal_id, codigo, descricao, ncm, cfop, unidade,
+        quantidade, valor_unitario, valor_total,
+        icms, ipi, pis, cofins, ordem_na_nota
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Campos de cada problema da validação, na ordem das colunas de _INSERT_PROBLEMA_SQL
+_PROBLEMA_FIELDS = (
+    'severidade', 'categoria', 'campo', 'descricao', 'valor_atual',
+    'valor_esperado', 'sugestao_correcao', 'impacto_fiscal',
+)
+_INSERT_PROBLEMA_SQL = f"""
+    INSERT INTO problemas (validacao_id, tipo, {', '.join(_PROBLEMA_FIELDS)})
+    VALUES (?, ?{', ?' * len(_PROBLEMA_FIELDS)})
+"""
+
+# v5: carga inicial do rollup diário para bancos que já tinham notas; o
+# dashboard passa a ler o rollup e o índice de cobertura idx_nf_dash, que
+# só pesava nas escritas, é descartado
+_ROLLUP_BACKFILL_SQL = """
+DROP INDEX IF EXISTS idx_nf_dash;
+INSERT INTO notas_fiscais_daily_rollup (day, total_notas, notas_com_valor, faturamento, impostos)
+SELECT
+    COALESCE(data_emissao, ''), COUNT(*), COUNT(valor_total_nf),
+    COALESCE(SUM(valor_total_nf), 0), COALESCE(SUM(valor_impostos_totais), 0)
+FROM notas_fiscais
+GROUP BY COALESCE(data_emissao, '');
+"""
+
+# Colunas usadas em listagens de notas (sem o backup JSON completo)
+_NOTA_RESUMO_FIELDS = (
+    'id', 'numero_nf', 'serie', 'chave_acesso', 'data_emissao', 'tipo_operacao',
+    'emitente_cnpj', 'emitente_razao_social', 'emitente_uf',
+    'destinatario_documento', 'destinatario_nome', 'destinatario_uf',
+    'valor_total_nf', 'valor_produtos', 'valor_icms', 'valor_pis', 'valor_cofins',
+)
+_NOTA_RESUMO_COLUMNS = ', '.join(_NOTA_RESUMO_FIELDS)
+
+# Filtro por período montado uma vez no import: a string SQL é sempre a
+# mesma e o cache de statements do sqlite3 reaproveita o prepare
+_NOTAS_PERIODO_SQL = f"""
+    SELECT {_NOTA_RESUMO_COLUMNS} FROM notas_fiscais
+    WHERE data_emissao BETWEEN ? AND ?
+    ORDER BY data_emissao DESC
+"""
+
+
+def _json_valor_sql(coluna: str) -> str:
+    """
+    Expressão JSON de uma coluna sem perda de precisão.
+    
+    O json_object do SQLite escreve REAL com 15 dígitos significativos
+    (0.1 + 0.2 vira 0.3); com 17 dígitos o float lido de volta é o mesmo
+    que foi gravado. Infinitos viram ±9e999, que o json.loads lê como inf.
+    """
+    return (
+        f"CASE typeof({coluna}) WHEN 'real' THEN json(CASE"
+        f" WHEN abs({coluna}) < 1e309 THEN printf('%!.17g', {coluna})"
+        f" WHEN {coluna} > 0 THEN '9e999' ELSE '-9e999' END)"
+        f" ELSE {coluna} END"
+    )
+
+
+def _json_object_sql(alias: str, fields: tuple) -> str:
+    """Monta json_object('campo', alias.campo, ...) para as colunas informadas"""
+    return 'json_object(' + ', '.join(
+        f"'{field}', {_json_valor_sql(f'{alias}.{field}')}" for field in fields
+    ) + ')'
+
+
+# Mesma listagem de get_notas_por_periodo, já serializada pelo SQLite (JSON1)
+_NOTAS_PERIODO_JSON_SQL = f"""
+    SELECT json_group_array({_json_object_sql('n', _NOTA_RESUMO_FIELDS)})
+    FROM ({_NOTAS_PERIODO_SQL}) n
+"""
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS notas_fiscais (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+    -- Identificação
+    numero_nf TEXT,
+    serie TEXT,
+    chave_acesso TEXT UNIQUE,
+    data_emissao DATE,
+    tipo_operacao TEXT,
+    natureza_operacao TEXT,
+
+    -- Emitente
+    emitente_cnpj TEXT,
+    emitente_razao_social TEXT,
+    emitente_uf TEXT,
+
+    -- Destinatário
+    destinatario_documento TEXT,
+    destinatario_tipo_documento TEXT,
+    destinatario_nome TEXT,
+    destinatario_uf TEXT,
+
+    -- Totais
+    valor_total_nf REAL,
+    valor_produtos REAL,
+    valor_icms REAL,
+    valor_icms_st REAL,
+    valor_ipi REAL,
+    valor_pis REAL,
+    valor_cofins REAL,
+    valor_frete REAL,
+    valor_desconto REAL,
+    valor_impostos_totais REAL,  -- valor_icms + valor_pis + valor_cofins, gravado junto com a nota
+
+    -- Metadata
+    arquivo_origem TEXT,
+    formato_original TEXT,
+    confianca_extracao REAL,
+    data_processamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- JSON completo (backup)
+    dados_completos_json TEXT,
+
+    -- Índices
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS produtos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nota_fiscal_id INTEGER NOT NULL,
+
+    codigo TEXT,
+    descricao TEXT,
+    ncm TEXT,
+    cfop TEXT,
+    unidade TEXT,
+    quantidade REAL,
+    valor_unitario REAL,
+    valor_total REAL,
+
+    -- Impostos do produto
+    icms REAL,
+    ipi REAL,
+    pis REAL,
+    cofins REAL,
+
+    ordem_na_nota INTEGER,
+
+    FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS validacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nota_fiscal_id INTEGER NOT NULL,
+
+    -- Resultado geral
+    status TEXT,  -- valido, invalido, com_avisos
+    score_conformidade REAL,
+    total_erros_criticos INTEGER,
+    total_erros INTEGER,
+    total_avisos INTEGER,
+    apto_processamento BOOLEAN,
+
+    -- Análise de risco
+    nivel_risco TEXT,  -- baixo, medio, alto, critico
+    necessita_revisao_manual BOOLEAN,
+    necessita_correcao_urgente BOOLEAN,
+
+    -- Metadata
+    versao_validador TEXT,
+    tempo_processamento_ms INTEGER,
+    data_validacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- JSON completo
+    resultado_completo_json TEXT,
+
+    FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS problemas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    validacao_id INTEGER,
+    analise_id INTEGER,
+
+    tipo TEXT,  -- validacao, analise_contextual, analise_negocio
+    severidade TEXT,  -- critico, erro, aviso, info
+    categoria TEXT,
+    campo TEXT,
+    descricao TEXT,
+    valor_atual TEXT,
+    valor_esperado TEXT,
+    sugestao_correcao TEXT,
+    impacto_fiscal TEXT,
+
+    data_deteccao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (validacao_id) REFERENCES validacoes(id) ON DELETE CASCADE,
+    FOREIGN KEY (analise_id) REFERENCES analises_contextuais(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS analises_contextuais (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nota_fiscal_id INTEGER NOT NULL,
+    validacao_id INTEGER,
+
+    -- Resultado
+    status_geral TEXT,
+    nivel_risco TEXT,
+    score_conformidade REAL,
+
+    -- Oportunidades
+    total_oportunidades INTEGER,
+    economia_potencial_estimada REAL,
+
+    -- Metadata
+    tempo_processamento_ms INTEGER,
+    data_analise TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- JSON completo
+    resultado_completo_json TEXT,
+
+    FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE,
+    FOREIGN KEY (validacao_id) REFERENCES validacoes(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS analises_negocio (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+    -- Período analisado
+    periodo_inicio DATE,
+    periodo_fim DATE,
+    total_notas_analisadas INTEGER,
+
+    -- Resumo executivo
+    faturamento_total REAL,
+    impostos_totais REAL,
+    carga_tributaria REAL,
+    status_geral TEXT,
+
+    -- Análise financeira
+    tendencia TEXT,  -- crescimento, estavel, queda
+    margem_bruta REAL,
+    margem_liquida REAL,
+
+    -- Análise tributária
+    regime_recomendado TEXT,
+    economia_potencial_anual REAL,
+
+    -- Totais
+    total_oportunidades INTEGER,
+    total_alertas INTEGER,
+    total_recomendacoes INTEGER,
+
+    -- Metadata
+    tempo_processamento_ms INTEGER,
+    data_analise TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- JSON completo
+    resultado_completo_json TEXT
+);
+
+CREATE TABLE IF NOT EXISTS analise_negocio_notas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    analise_negocio_id INTEGER NOT NULL,
+    nota_fiscal_id INTEGER NOT NULL,
+
+    FOREIGN KEY (analise_negocio_id) REFERENCES analises_negocio(id) ON DELETE CASCADE,
+    FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE,
+    UNIQUE(analise_negocio_id, nota_fiscal_id)
+);
+
+CREATE TABLE IF NOT EXISTS recomendacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    analise_contextual_id INTEGER,
+    analise_negocio_id INTEGER,
+
+    prioridade TEXT,  -- alta, media, baixa
+    area TEXT,  -- tributaria, financeira, operacional
+    acao TEXT,
+    beneficio_estimado TEXT,
+    prazo_implementacao TEXT,
+    complexidade TEXT,  -- baixa, media, alta
+
+    status TEXT DEFAULT 'pendente',  -- pendente, em_andamento, concluida, cancelada
+    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (analise_contextual_id) REFERENCES analises_contextuais(id) ON DELETE CASCADE,
+    FOREIGN KEY (analise_negocio_id) REFERENCES analises_negocio(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_nf_chave ON notas_fiscais(chave_acesso);
+CREATE INDEX IF NOT EXISTS idx_nf_emitente ON notas_fiscais(emitente_cnpj);
+CREATE INDEX IF NOT EXISTS idx_nf_data ON notas_fiscais(data_emissao);
+CREATE INDEX IF NOT EXISTS idx_produtos_nota ON produtos(nota_fiscal_id);
+CREATE INDEX IF NOT EXISTS idx_validacoes_nota ON validacoes(nota_fiscal_id);
+CREATE INDEX IF NOT EXISTS idx_problemas_validacao ON problemas(validacao_id);
+CREATE INDEX IF NOT EXISTS idx_analises_nota ON analises_contextuais(nota_fiscal_id);
+
+-- Agregados diários para o dashboard, mantidos por triggers a cada escrita
+-- (day = '' agrupa notas sem data de emissão)
+CREATE TABLE IF NOT EXISTS notas_fiscais_daily_rollup (
+    day DATE PRIMARY KEY,
+    total_notas INTEGER NOT NULL DEFAULT 0,
+    notas_com_valor INTEGER NOT NULL DEFAULT 0,  -- notas com valor_total_nf (base do ticket médio)
+    faturamento REAL NOT NULL DEFAULT 0,
+    impostos REAL NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON notas_fiscais
+BEGIN
+    INSERT INTO notas_fiscais_daily_rollup (day, total_notas, notas_com_valor, faturamento, impostos)
+    VALUES (
+        COALESCE(NEW.data_emissao, ''), 1, NEW.valor_total_nf IS NOT NULL,
+        COALESCE(NEW.valor_total_nf, 0), COALESCE(NEW.valor_impostos_totais, 0)
+    )
+    ON CONFLICT(day) DO UPDATE SET
+        total_notas = total_notas + 1,
+        notas_com_valor = notas_com_valor + excluded.notas_com_valor,
+        faturamento = faturamento + excluded.faturamento,
+        impostos = impostos + excluded.impostos;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON notas_fiscais
+BEGIN
+    UPDATE notas_fiscais_daily_rollup SET
+        total_notas = total_notas - 1,
+        notas_com_valor = notas_com_valor - (OLD.valor_total_nf IS NOT NULL),
+        faturamento = faturamento - COALESCE(OLD.valor_total_nf, 0),
+        impostos = impostos - COALESCE(OLD.valor_impostos_totais, 0)
+    WHERE day = COALESCE(OLD.data_emissao, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_update
+AFTER UPDATE OF data_emissao, valor_total_nf, valor_impostos_totais ON notas_fiscais
+BEGIN
+    UPDATE notas_fiscais_daily_rollup SET
+        total_notas = total_notas - 1,
+        notas_com_valor = notas_com_valor - (OLD.valor_total_nf IS NOT NULL),
+        faturamento = faturamento - COALESCE(OLD.valor_total_nf, 0),
+        impostos = impostos - COALESCE(OLD.valor_impostos_totais, 0)
+    WHERE day = COALESCE(OLD.data_emissao, '');
+
+    INSERT INTO notas_fiscais_daily_rollup (day, total_notas, notas_com_valor, faturamento, impostos)
+    VALUES (
+        COALESCE(NEW.data_emissao, ''), 1, NEW.valor_total_nf IS NOT NULL,
+        COALESCE(NEW.valor_total_nf, 0), COALESCE(NEW.valor_impostos_totais, 0)
+    )
+    ON CONFLICT(day) DO UPDATE SET
+        total_notas = total_notas + 1,
+        notas_com_valor = notas_com_valor + excluded.notas_com_valor,
+        faturamento = faturamento + excluded.faturamento,
+        impostos = impostos + excluded.impostos;
+END;
+
+-- Índices parciais para as contagens do dashboard (só guardam as linhas contadas)
+CREATE INDEX IF NOT EXISTS idx_problemas_criticos ON problemas(id) WHERE severidade = 'critico';
+CREATE INDEX IF NOT EXISTS idx_recomendacoes_pendentes_alta ON recomendacoes(id) WHERE status = 'pendente' AND prioridade = 'alta';
+"""
+
+# Colunas devolvidas por get_nota_completa(s): tudo exceto os backups JSON
+# completos (dados_completos_json / resultado_completo_json), que são grandes
+# e não são usados na exibição
+_NOTA_DETALHE_FIELDS = (
+    'id', 'numero_nf', 'serie', 'chave_acesso', 'data_emissao', 'tipo_operacao', 'natureza_operacao',
+    'emitente_cnpj', 'emitente_razao_social', 'emitente_uf',
+    'destinatario_documento', 'destinatario_tipo_documento', 'destinatario_nome', 'destinatario_uf',
+    'valor_total_nf', 'valor_produtos', 'valor_icms', 'valor_icms_st', 'valor_ipi',
+    'valor_pis', 'valor_cofins', 'valor_frete', 'valor_desconto', 'valor_impostos_totais',
+    'arquivo_origem', 'formato_original', 'confianca_extracao', 'data_processamento',
+    'created_at', 'updated_at',
+)
+_PRODUTO_FIELDS = (
+    'id', 'nota_fiscal_id', 'codigo', 'descricao', 'ncm', 'cfop', 'unidade',
+    'quantidade', 'valor_unitario', 'valor_total',
+    'icms', 'ipi', 'pis', 'cofins', 'ordem_na_nota',
+)
+_VALIDACAO_FIELDS = (
+    'id', 'nota_fiscal_id', 'status', 'score_conformidade',
+    'total_erros_criticos', 'total_erros', 'total_avisos', 'apto_processamento',
+    'nivel_risco', 'necessita_revisao_manual', 'necessita_correcao_urgente',
+    'versao_validador', 'tempo_processamento_ms', 'data_validacao',
+)
+_ANALISE_FIELDS = (
+    'id', 'nota_fiscal_id', 'validacao_id', 'status_geral', 'nivel_risco',
+    'score_conformidade', 'total_oportunidades', 'economia_potencial_estimada',
+    'tempo_processamento_ms', 'data_analise',
+)
+
+
+# Nota + filhos em uma única consulta (filhos agregados via JSON1)
+_NOTA_COMPLETA_SQL = f"""
+    SELECT
+        {', '.join(f'n.{field}' for field in _NOTA_DETALHE_FIELDS)},
+        (
+            SELECT json_group_array({_json_object_sql('p', _PRODUTO_FIELDS)})
+            FROM (
+                SELECT * FROM produtos
+                WHERE nota_fiscal_id = n.id
+                ORDER BY ordem_na_nota
+            ) p
+        ) AS produtos_json,
+        (
+            SELECT {_json_object_sql('v', _VALIDACAO_FIELDS)}
+            FROM validacoes v
+            WHERE v.nota_fiscal_id = n.id
+            ORDER BY v.data_validacao DESC, v.id DESC
+            LIMIT 1
+        ) AS validacao_json,
+        (
+            SELECT {_json_object_sql('a', _ANALISE_FIELDS)}
+            FROM analises_contextuais a
+            WHERE a.nota_fiscal_id = n.id
+            ORDER BY a.data_analise DESC, a.id DESC
+            LIMIT 1
+        ) AS analise_json
+    FROM notas_fiscais n
+    WHERE n.id = ?
+"""
+
+# Páginas de notas por período, ordenadas por (data_emissao, id); o índice
+# idx_nf_data já carrega o rowid, então não há ordenação em memória. Nas
+# páginas seguintes o cursor (sempre <= data_fim) é o limite superior, o que
+# faz a busca começar direto nele em vez de pular as linhas já lidas
+_NOTAS_PAGINA_SQL = f"""
+    SELECT {_NOTA_RESUMO_COLUMNS} FROM notas_fiscais
+    WHERE data_emissao BETWEEN ? AND ?
+    ORDER BY data_emissao DESC, id DESC
+    LIMIT ?
+"""
+_NOTAS_PAGINA_APOS_SQL = f"""
+    SELECT {_NOTA_RESUMO_COLUMNS} FROM notas_fiscais
+    WHERE data_emissao >= ? AND (data_emissao, id) < (?, ?)
+    ORDER BY data_emissao DESC, id DESC
+    LIMIT ?
+"""
+
+# Métricas do dashboard, lidas do rollup diário (uma linha por dia, não por
+# nota); duas strings fixas (com e sem filtro de período)
+# para que o cache de statements do sqlite3 sempre reutilize o prepare
+_DASHBOARD_SQL_TEMPLATE = """
+    SELECT 
+        COALESCE(SUM(total_notas), 0) as total_notas,
+        SUM(faturamento) as faturamento_total,
+        SUM(impostos) as impostos_totais,
+        SUM(faturamento) / SUM(notas_com_valor) as ticket_medio,
+        (
+            SELECT COUNT(*) FROM problemas
+            WHERE severidade = 'critico'
+        ) as problemas_criticos,
+        (
+            SELECT COUNT(*) FROM recomendacoes
+            WHERE status = 'pendente' AND prioridade = 'alta'
+        ) as recomendacoes_pendentes
+    FROM notas_fiscais_daily_rollup
+    {where_clause}
+"""
+_DASHBOARD_SQL = _DASHBOARD_SQL_TEMPLATE.format(where_clause="")
+_DASHBOARD_PERIODO_SQL = _DASHBOARD_SQL_TEMPLATE.format(
+    where_clause="WHERE day BETWEEN ? AND ?"
+)
+
 class FiscalDatabase:
     """
     Gerenciador de banco de dados SQLite para sistema fiscal.
@@ -24,261 +514,117 @@ class FiscalDatabase:
         """
         Inicializa conexão com banco de dados.
         
+        A conexão só pode ser usada pela thread que criou a instância; para
+        uso concorrente, cada thread deve obter a sua via get_database().
+        
         Args:
             db_path: Caminho para arquivo do banco SQLite
         """
         self.db_path = db_path
         self.conn = None
+        self._dash_cache: Dict[Tuple[Optional[str], Optional[str]], Tuple[int, Dict]] = {}
+        self._transaction_depth = 0
         self._connect()
         self._create_tables()
         logger.info(f"Database inicializado: {db_path}")
     
     def _connect(self):
         """Conecta ao banco de dados"""
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(self.db_path, cached_statements=_CACHED_STATEMENTS)
         self.conn.row_factory = sqlite3.Row  # Retorna dicts
+        self.conn.executescript(_CONNECTION_PRAGMAS)
         
     def _create_tables(self):
         """Cria todas as tabelas necessárias"""
-        cursor = self.conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS notas_fiscais (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                
-                -- Identificação
-                numero_nf TEXT,
-                serie TEXT,
-                chave_acesso TEXT UNIQUE,
-                data_emissao DATE,
-                tipo_operacao TEXT,
-                natureza_operacao TEXT,
-                
-                -- Emitente
-                emitente_cnpj TEXT,
-                emitente_razao_social TEXT,
-                emitente_uf TEXT,
-                
-                -- Destinatário
-                destinatario_documento TEXT,
-                destinatario_tipo_documento TEXT,
-                destinatario_nome TEXT,
-                destinatario_uf TEXT,
-                
-                -- Totais
-                valor_total_nf REAL,
-                valor_produtos REAL,
-                valor_icms REAL,
-                valor_icms_st REAL,
-                valor_ipi REAL,
-                valor_pis REAL,
-                valor_cofins REAL,
-                valor_frete REAL,
-                valor_desconto REAL,
-                
-                -- Metadata
-                arquivo_origem TEXT,
-                formato_original TEXT,
-                confianca_extracao REAL,
-                data_processamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                
-                -- JSON completo (backup)
-                dados_completos_json TEXT,
-                
-                -- Índices
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        versao = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if versao == SCHEMA_VERSION:
+            return
+        if versao > SCHEMA_VERSION:
+            # Banco criado por uma versão mais nova: não aplica DDL antiga nem
+            # rebaixa o user_version gravado
+            logger.warning(
+                f"Schema do banco (v{versao}) é mais novo que o suportado "
+                f"(v{SCHEMA_VERSION}); tabelas mantidas como estão"
             )
-        """)
+            return
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS produtos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nota_fiscal_id INTEGER NOT NULL,
-                
-                codigo TEXT,
-                descricao TEXT,
-                ncm TEXT,
-                cfop TEXT,
-                unidade TEXT,
-                quantidade REAL,
-                valor_unitario REAL,
-                valor_total REAL,
-                
-                -- Impostos do produto
-                icms REAL,
-                ipi REAL,
-                pis REAL,
-                cofins REAL,
-                
-                ordem_na_nota INTEGER,
-                
-                FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE
-            )
-        """)
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS validacoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nota_fiscal_id INTEGER NOT NULL,
-                
-                -- Resultado geral
-                status TEXT,  -- valido, invalido, com_avisos
-                score_conformidade REAL,
-                total_erros_criticos INTEGER,
-                total_erros INTEGER,
-                total_avisos INTEGER,
-                apto_processamento BOOLEAN,
-                
-                -- Análise de risco
-                nivel_risco TEXT,  -- baixo, medio, alto, critico
-                necessita_revisao_manual BOOLEAN,
-                necessita_correcao_urgente BOOLEAN,
-                
-                -- Metadata
-                versao_validador TEXT,
-                tempo_processamento_ms INTEGER,
-                data_validacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                
-                -- JSON completo
-                resultado_completo_json TEXT,
-                
-                FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE
-            )
-        """)
+        self._migrate_existing_tables()
+        self.conn.executescript(_SCHEMA_SQL)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS problemas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                validacao_id INTEGER,
-                analise_id INTEGER,
-                
-                tipo TEXT,  -- validacao, analise_contextual, analise_negocio
-                severidade TEXT,  -- critico, erro, aviso, info
-                categoria TEXT,
-                campo TEXT,
-                descricao TEXT,
-                valor_atual TEXT,
-                valor_esperado TEXT,
-                sugestao_correcao TEXT,
-                impacto_fiscal TEXT,
-                
-                data_deteccao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                
-                FOREIGN KEY (validacao_id) REFERENCES validacoes(id) ON DELETE CASCADE,
-                FOREIGN KEY (analise_id) REFERENCES analises_contextuais(id) ON DELETE CASCADE
-            )
-        """)
+        if 'notas_fiscais' in tables and 'notas_fiscais_daily_rollup' not in tables:
+            self.conn.executescript(_ROLLUP_BACKFILL_SQL)
+            logger.info("Rollup diário do dashboard preenchido a partir das notas existentes")
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        
+        self.conn.commit()
+        logger.info("Tabelas criadas/verificadas com sucesso")
+    
+    def _migrate_existing_tables(self):
+        """Ajusta tabelas criadas por versões anteriores do schema"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(notas_fiscais)")}
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS analises_contextuais (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nota_fiscal_id INTEGER NOT NULL,
-                validacao_id INTEGER,
-                
-                -- Resultado
-                status_geral TEXT,
-                nivel_risco TEXT,
-                score_conformidade REAL,
-                
-                -- Oportunidades
-                total_oportunidades INTEGER,
-                economia_potencial_estimada REAL,
-                
-                -- Metadata
-                tempo_processamento_ms INTEGER,
-                data_analise TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                
-                -- JSON completo
-                resultado_completo_json TEXT,
-                
-                FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE,
-                FOREIGN KEY (validacao_id) REFERENCES validacoes(id) ON DELETE CASCADE
-            )
-        """)
+        if columns and 'valor_impostos_totais' not in columns:
+            self.conn.executescript(_MIGRATION_IMPOSTOS_TOTAIS_SQL)
+            logger.info("Coluna valor_impostos_totais adicionada a notas_fiscais")
+    
+    def _data_version(self) -> int:
+        """
+        PRAGMA data_version: muda quando outra conexão (de outra thread ou
+        processo) confirma uma escrita no banco; as desta conexão não contam
+        """
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS analises_negocio (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                
-                -- Período analisado
-                periodo_inicio DATE,
-                periodo_fim DATE,
-                total_notas_analisadas INTEGER,
-                
-                -- Resumo executivo
-                faturamento_total REAL,
-                impostos_totais REAL,
-                carga_tributaria REAL,
-                status_geral TEXT,
-                
-                -- Análise financeira
-                tendencia TEXT,  -- crescimento, estavel, queda
-                margem_bruta REAL,
-                margem_liquida REAL,
-                
-                -- Análise tributária
-                regime_recomendado TEXT,
-                economia_potencial_anual REAL,
-                
-                -- Totais
-                total_oportunidades INTEGER,
-                total_alertas INTEGER,
-                total_recomendacoes INTEGER,
-                
-                -- Metadata
-                tempo_processamento_ms INTEGER,
-                data_analise TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                
-                -- JSON completo
-                resultado_completo_json TEXT
-            )
-        """)
+    def _invalidate_dashboard_cache(self):
+        """Descarta métricas de dashboard em cache (chamado após cada escrita)"""
+        self._dash_cache.clear()
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS analise_negocio_notas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                analise_negocio_id INTEGER NOT NULL,
-                nota_fiscal_id INTEGER NOT NULL,
-                
-                FOREIGN KEY (analise_negocio_id) REFERENCES analises_negocio(id) ON DELETE CASCADE,
-                FOREIGN KEY (nota_fiscal_id) REFERENCES notas_fiscais(id) ON DELETE CASCADE,
-                UNIQUE(analise_negocio_id, nota_fiscal_id)
-            )
-        """)
+    def _commit(self):
+        """Confirma a escrita, exceto dentro de transaction() (que confirma ao final)"""
+        if not self._transaction_depth:
+            self.conn.commit()
+        self._invalidate_dashboard_cache()
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS recomendacoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                analise_contextual_id INTEGER,
-                analise_negocio_id INTEGER,
-                
-                prioridade TEXT,  -- alta, media, baixa
-                area TEXT,  -- tributaria, financeira, operacional
-                acao TEXT,
-                beneficio_estimado TEXT,
-                prazo_implementacao TEXT,
-                complexidade TEXT,  -- baixa, media, alta
-                
-                status TEXT DEFAULT 'pendente',  -- pendente, em_andamento, concluida, cancelada
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                
-                FOREIGN KEY (analise_contextual_id) REFERENCES analises_contextuais(id) ON DELETE CASCADE,
-                FOREIGN KEY (analise_negocio_id) REFERENCES analises_negocio(id) ON DELETE CASCADE
-            )
-        """)
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa várias chamadas save_* em uma única transação.
+        
+        Os commits individuais são suspensos e um único commit é feito ao
+        sair do bloco (ou rollback, em caso de exceção).
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._transaction_depth == 1:
+                self.conn.rollback()
+            raise
+        else:
+            if self._transaction_depth == 1:
+                self.conn.commit()
+        finally:
+            self._transaction_depth -= 1
+            self._invalidate_dashboard_cache()
 
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_nf_chave ON notas_fiscais(chave_acesso)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_nf_emitente ON notas_fiscais(emitente_cnpj)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_nf_data ON notas_fiscais(data_emissao)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_produtos_nota ON produtos(nota_fiscal_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_validacoes_nota ON validacoes(nota_fiscal_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_problemas_validacao ON problemas(validacao_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_analises_nota ON analises_contextuais(nota_fiscal_id)")
+    def bulk_save(self, extractions: List[Dict], update_if_exists: bool = True, skip_if_exists: bool = False) -> List[int]:
+        """
+        Salva várias extrações em uma única transação.
         
-        self.conn.commit()
-        logger.info("Tabelas criadas/verificadas com sucesso")
+        Args:
+            extractions: Lista de dicts com dados extraídos (schema NotaFiscalExtract)
+            update_if_exists: Ver save_extraction
+            skip_if_exists: Ver save_extraction
+        
+        Returns:
+            IDs das notas fiscais, na mesma ordem de extractions
+        """
+        with self.transaction():
+            return [
+                self.save_extraction(extraction, update_if_exists, skip_if_exists)
+                for extraction in extractions
+            ]
     
     def nota_exists(self, chave_acesso: str) -> Optional[int]:
         """
@@ -320,6 +666,7 @@ class FiscalDatabase:
         produtos = extraction_data.get('produtos', [])
         
         chave_acesso = identificacao.get('chave_acesso')
+        impostos = (totais.get('valor_icms'), totais.get('valor_pis'), totais.get('valor_cofins'))
 
         existing_id = self.nota_exists(chave_acesso) if chave_acesso else None
         
@@ -336,6 +683,7 @@ class FiscalDatabase:
                         destinatario_documento = ?, destinatario_tipo_documento = ?, destinatario_nome = ?, destinatario_uf = ?,
                         valor_total_nf = ?, valor_produtos = ?, valor_icms = ?, valor_icms_st = ?, valor_ipi = ?, 
                         valor_pis = ?, valor_cofins = ?, valor_frete = ?, valor_desconto = ?,
+                        valor_impostos_totais = ? + COALESCE(?, 0) + COALESCE(?, 0),
                         arquivo_origem = ?, formato_original = ?, confianca_extracao = ?,
                         dados_completos_json = ?,
                         updated_at = CURRENT_TIMESTAMP
@@ -362,6 +710,7 @@ class FiscalDatabase:
                     totais.get('valor_cofins'),
                     totais.get('valor_frete'),
                     totais.get('valor_desconto'),
+                    *impostos,
                     metadata.get('arquivo_processado'),
                     metadata.get('formato_original'),
                     metadata.get('confianca_extracao'),
@@ -371,32 +720,9 @@ class FiscalDatabase:
 
                 cursor.execute("DELETE FROM produtos WHERE nota_fiscal_id = ?", (existing_id,))
                 
-                for idx, produto in enumerate(produtos):
-                    impostos = produto.get('impostos', {})
-                    cursor.execute("""
-                        INSERT INTO produtos (
-                            nota_fiscal_id, codigo, descricao, ncm, cfop, unidade,
-                            quantidade, valor_unitario, valor_total,
-                            icms, ipi, pis, cofins, ordem_na_nota
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        existing_id,
-                        produto.get('codigo'),
-                        produto.get('descricao'),
-                        produto.get('ncm'),
-                        produto.get('cfop'),
-                        produto.get('unidade'),
-                        produto.get('quantidade'),
-                        produto.get('valor_unitario'),
-                        produto.get('valor_total'),
-                        impostos.get('icms'),
-                        impostos.get('ipi'),
-                        impostos.get('pis'),
-                        impostos.get('cofins'),
-                        idx
-                    ))
+                cursor.executemany(_INSERT_PRODUTO_SQL, self._produto_rows(existing_id, produtos))
                 
-                self.conn.commit()
+                self._commit()
                 logger.info(f"Nota atualizada: nota_fiscal_id={existing_id}, chave={chave_acesso}")
                 return existing_id
 
@@ -406,10 +732,11 @@ class FiscalDatabase:
                 emitente_cnpj, emitente_razao_social, emitente_uf,
                 destinatario_documento, destinatario_tipo_documento, destinatario_nome, destinatario_uf,
                 valor_total_nf, valor_produtos, valor_icms, valor_icms_st, valor_ipi, 
-                valor_pis, valor_cofins, valor_frete, valor_desconto,
+                valor_pis, valor_cofins, valor_frete, valor_desconto, valor_impostos_totais,
                 arquivo_origem, formato_original, confianca_extracao,
                 dados_completos_json
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                      ? + COALESCE(?, 0) + COALESCE(?, 0), ?, ?, ?, ?)
         """, (
             identificacao.get('numero_nf'),
             identificacao.get('serie'),
@@ -433,6 +760,7 @@ class FiscalDatabase:
             totais.get('valor_cofins'),
             totais.get('valor_frete'),
             totais.get('valor_desconto'),
+            *impostos,
             metadata.get('arquivo_processado'),
             metadata.get('formato_original'),
             metadata.get('confianca_extracao'),
@@ -441,15 +769,19 @@ class FiscalDatabase:
         
         nota_fiscal_id = cursor.lastrowid
 
+        cursor.executemany(_INSERT_PRODUTO_SQL, self._produto_rows(nota_fiscal_id, produtos))
+        
+        self._commit()
+        logger.info(f"Extração salva: nota_fiscal_id={nota_fiscal_id}, chave={identificacao.get('chave_acesso')}")
+        
+        return nota_fiscal_id
+    
+    def _produto_rows(self, nota_fiscal_id: int, produtos: List[Dict]) -> List[tuple]:
+        """Monta as linhas de produtos (na ordem de _INSERT_PRODUTO_SQL) para executemany"""
+        rows = []
         for idx, produto in enumerate(produtos):
             impostos = produto.get('impostos', {})
-            cursor.execute("""
-                INSERT INTO produtos (
-                    nota_fiscal_id, codigo, descricao, ncm, cfop, unidade,
-                    quantidade, valor_unitario, valor_total,
-                    icms, ipi, pis, cofins, ordem_na_nota
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            rows.append((
                 nota_fiscal_id,
                 produto.get('codigo'),
                 produto.get('descricao'),
@@ -465,11 +797,14 @@ class FiscalDatabase:
                 impostos.get('cofins'),
                 idx
             ))
-        
-        self.conn.commit()
-        logger.info(f"Extração salva: nota_fiscal_id={nota_fiscal_id}, chave={identificacao.get('chave_acesso')}")
-        
-        return nota_fiscal_id
+        return rows
+    
+    def _problema_rows(self, validacao_id: int, problemas: List[Dict]) -> List[tuple]:
+        """Monta as linhas de problemas (na ordem de _INSERT_PROBLEMA_SQL) para executemany"""
+        return [
+            (validacao_id, 'validacao', *map(problema.get, _PROBLEMA_FIELDS))
+            for problema in problemas
+        ]
     
     def save_validation(self, nota_fiscal_id: int, validation_data: Dict) -> int:
         """
@@ -517,26 +852,9 @@ class FiscalDatabase:
         
         validacao_id = cursor.lastrowid
 
-        for problema in problemas:
-            cursor.execute("""
-                INSERT INTO problemas (
-                    validacao_id, tipo, severidade, categoria, campo,
-                    descricao, valor_atual, valor_esperado, sugestao_correcao, impacto_fiscal
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                validacao_id,
-                'validacao',
-                problema.get('severidade'),
-                problema.get('categoria'),
-                problema.get('campo'),
-                problema.get('descricao'),
-                problema.get('valor_atual'),
-                problema.get('valor_esperado'),
-                problema.get('sugestao_correcao'),
-                problema.get('impacto_fiscal')
-            ))
-        
-        self.conn.commit()
+        cursor.executemany(_INSERT_PROBLEMA_SQL, self._problema_rows(validacao_id, problemas))
+
+        self._commit()
         logger.info(f"Validação salva: validacao_id={validacao_id}, status={validacao_geral.get('status')}")
         
         return validacao_id
@@ -602,7 +920,7 @@ class FiscalDatabase:
                 rec.get('complexidade')
             ))
         
-        self.conn.commit()
+        self._commit()
         logger.info(f"Análise contextual salva: analise_id={analise_id}")
         
         return analise_id
@@ -707,7 +1025,7 @@ class FiscalDatabase:
                 rec.get('complexidade')
             ))
         
-        self.conn.commit()
+        self._commit()
         logger.info(f"Análise de negócio salva: analise_negocio_id={analise_negocio_id}, notas={len(notas_fiscais_ids)}")
         
         return analise_negocio_id
@@ -716,37 +1034,107 @@ class FiscalDatabase:
         """
         Busca nota fiscal com todos os dados relacionados.
         
+        Os backups JSON completos não são incluídos (ver _NOTA_DETALHE_FIELDS).
+        
         Returns:
             Dict com nota, produtos, validação e análises
         """
         cursor = self.conn.cursor()
-
-        cursor.execute("SELECT * FROM notas_fiscais WHERE id = ?", (nota_fiscal_id,))
-        nota = cursor.fetchone()
+        cursor.execute(_NOTA_COMPLETA_SQL, (nota_fiscal_id,))
+        row = cursor.fetchone()
         
-        if not nota:
+        if not row:
             return None
 
-        cursor.execute("SELECT * FROM produtos WHERE nota_fiscal_id = ? ORDER BY ordem_na_nota", (nota_fiscal_id,))
-        produtos = cursor.fetchall()
-
-        cursor.execute("SELECT * FROM validacoes WHERE nota_fiscal_id = ? ORDER BY data_validacao DESC LIMIT 1", (nota_fiscal_id,))
-        validacao = cursor.fetchone()
-
-        cursor.execute("SELECT * FROM analises_contextuais WHERE nota_fiscal_id = ? ORDER BY data_analise DESC LIMIT 1", (nota_fiscal_id,))
-        analise = cursor.fetchone()
+        nota = dict(row)
+        produtos = json.loads(nota.pop('produtos_json'))
+        validacao = nota.pop('validacao_json')
+        analise = nota.pop('analise_json')
         
         return {
-            'nota_fiscal': dict(nota),
-            'produtos': [dict(p) for p in produtos],
-            'validacao': dict(validacao) if validacao else None,
-            'analise_contextual': dict(analise) if analise else None
+            'nota_fiscal': nota,
+            'produtos': produtos,
+            'validacao': json.loads(validacao) if validacao else None,
+            'analise_contextual': json.loads(analise) if analise else None
         }
     
+    def get_notas_completas(self, notas_fiscais_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Busca várias notas fiscais com todos os dados relacionados.
+        
+        Equivalente a chamar get_nota_completa para cada ID, mas com uma
+        consulta por tabela (em lotes de até _MAX_SQL_PARAMS IDs).
+        
+        Args:
+            notas_fiscais_ids: Lista de IDs das notas
+        
+        Returns:
+            Dict {nota_fiscal_id: dados no formato de get_nota_completa};
+            IDs inexistentes são omitidos
+        """
+        cursor = self.conn.cursor()
+        resultado = {}
+
+        for start in range(0, len(notas_fiscais_ids), _MAX_SQL_PARAMS):
+            chunk = notas_fiscais_ids[start:start + _MAX_SQL_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+
+            cursor.execute(f"SELECT {', '.join(_NOTA_DETALHE_FIELDS)} FROM notas_fiscais WHERE id IN ({placeholders})", chunk)
+            for nota in cursor:
+                resultado[nota['id']] = {
+                    'nota_fiscal': dict(nota),
+                    'produtos': [],
+                    'validacao': None,
+                    'analise_contextual': None
+                }
+
+            cursor.execute(f"""
+                SELECT {', '.join(_PRODUTO_FIELDS)} FROM produtos
+                WHERE nota_fiscal_id IN ({placeholders})
+                ORDER BY nota_fiscal_id, ordem_na_nota
+            """, chunk)
+            for produto in cursor:
+                resultado[produto['nota_fiscal_id']]['produtos'].append(dict(produto))
+
+            cursor.execute(f"""
+                SELECT * FROM (
+                    SELECT {', '.join(_VALIDACAO_FIELDS)}, ROW_NUMBER() OVER (
+                        PARTITION BY nota_fiscal_id ORDER BY data_validacao DESC, id DESC
+                    ) AS rn
+                    FROM validacoes
+                    WHERE nota_fiscal_id IN ({placeholders})
+                )
+                WHERE rn = 1
+            """, chunk)
+            for validacao in cursor:
+                validacao = dict(validacao)
+                del validacao['rn']
+                resultado[validacao['nota_fiscal_id']]['validacao'] = validacao
+
+            cursor.execute(f"""
+                SELECT * FROM (
+                    SELECT {', '.join(_ANALISE_FIELDS)}, ROW_NUMBER() OVER (
+                        PARTITION BY nota_fiscal_id ORDER BY data_analise DESC, id DESC
+                    ) AS rn
+                    FROM analises_contextuais
+                    WHERE nota_fiscal_id IN ({placeholders})
+                )
+                WHERE rn = 1
+            """, chunk)
+            for analise in cursor:
+                analise = dict(analise)
+                del analise['rn']
+                resultado[analise['nota_fiscal_id']]['analise_contextual'] = analise
+
+        return resultado
+    
     def get_notas_por_periodo(self, data_inicio: str, data_fim: str) -> List[Dict]:
         """
         Busca notas por período.
         
+        Retorna apenas as colunas de resumo (_NOTA_RESUMO_COLUMNS); para os
+        dados completos de uma nota use get_nota_completa.
+        
         Args:
             data_inicio: Data início (YYYY-MM-DD)
             data_fim: Data fim (YYYY-MM-DD)
@@ -755,65 +1143,174 @@ class FiscalDatabase:
             Lista de notas
         """
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM notas_fiscais 
-            WHERE data_emissao BETWEEN ? AND ?
-            ORDER BY data_emissao DESC
-        """, (data_inicio, data_fim))
+        cursor.execute(_NOTAS_PERIODO_SQL, (data_inicio, data_fim))
+        return [dict(row) for row in cursor]
+    
+    def get_notas_por_periodo_iter(self, data_inicio: str, data_fim: str) -> Iterator[Dict]:
+        """
+        Busca notas por período, uma por vez.
+        
+        Mesmo conteúdo de get_notas_por_periodo, sem materializar o período
+        inteiro em memória. O cursor fica aberto na conexão desta instância
+        até o iterador ser esgotado ou fechado, então consuma-o antes de
+        gravar pela mesma instância.
         
-        return [dict(row) for row in cursor.fetchall()]
+        Args:
+            data_inicio: Data início (YYYY-MM-DD)
+            data_fim: Data fim (YYYY-MM-DD)
+        
+        Returns:
+            Iterador de notas (percorrível uma única vez)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(_NOTAS_PERIODO_SQL, (data_inicio, data_fim))
+        try:
+            for row in cursor:
+                yield dict(row)
+        finally:
+            cursor.close()
     
-    def get_dashboard_data(self, data_inicio: str = None, data_fim: str = None) -> Dict:
+    def get_notas_por_periodo_json(self, data_inicio: str, data_fim: str) -> str:
         """
-        Busca dados para dashboard.
+        Busca notas por período já serializadas como array JSON.
+        
+        Mesmo conteúdo de get_notas_por_periodo, mas montado pelo SQLite,
+        sem criar dicts Python; útil para responder diretamente a clientes
+        que consomem JSON.
+        
+        Args:
+            data_inicio: Data início (YYYY-MM-DD)
+            data_fim: Data fim (YYYY-MM-DD)
         
         Returns:
-            Dict com métricas agregadas
+            String JSON com a lista de notas
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(_NOTAS_PERIODO_JSON_SQL, (data_inicio, data_fim))
+        return cursor.fetchone()[0]
+    
+    def get_notas_por_periodo_paginado(
+        self,
+        data_inicio: str,
+        data_fim: str,
+        after: Optional[Tuple[str, int]] = None,
+        limit: int = 200
+    ) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """
+        Busca uma página de notas do período (paginação por keyset).
+        
+        As notas são ordenadas por (data_emissao, id) decrescente; cada página
+        continua a partir do cursor da anterior, sem o custo de OFFSET.
+        
+        Args:
+            data_inicio: Data início (YYYY-MM-DD)
+            data_fim: Data fim (YYYY-MM-DD)
+            after: Cursor retornado pela página anterior (None para a primeira)
+            limit: Máximo de notas por página
+        
+        Returns:
+            Tupla (notas da página, cursor da próxima página ou None se acabou)
         """
         cursor = self.conn.cursor()
 
-        where_clause = ""
-        params = []
-        if data_inicio and data_fim:
-            where_clause = "WHERE data_emissao BETWEEN ? AND ?"
-            params = [data_inicio, data_fim]
+        if after is None:
+            cursor.execute(_NOTAS_PAGINA_SQL, (data_inicio, data_fim, limit))
+        else:
+            cursor.execute(_NOTAS_PAGINA_APOS_SQL, (data_inicio, *after, limit))
 
-        cursor.execute(f"""
-            SELECT 
-                COUNT(*) as total_notas,
-                SUM(valor_total_nf) as faturamento_total,
-                SUM(valor_icms + COALESCE(valor_pis, 0) + COALESCE(valor_cofins, 0)) as impostos_totais,
-                AVG(valor_total_nf) as ticket_medio
-            FROM notas_fiscais
-            {where_clause}
-        """, params)
-        
-        metricas = dict(cursor.fetchone())
+        notas = [dict(row) for row in cursor]
 
-        cursor.execute("""
-            SELECT COUNT(*) as total_criticos
-            FROM problemas
-            WHERE severidade = 'critico'
-        """)
+        next_cursor = None
+        if len(notas) == limit:
+            next_cursor = (notas[-1]['data_emissao'], notas[-1]['id'])
+
+        return notas, next_cursor
+    
+    def get_dashboard_data(self, data_inicio: str = None, data_fim: str = None) -> Dict:
+        """
+        Busca dados para dashboard.
+        
+        O resultado fica em cache até a próxima escrita: as desta instância
+        limpam o cache e as de outras conexões mudam o PRAGMA data_version
+        guardado junto com as métricas.
         
-        metricas['problemas_criticos'] = cursor.fetchone()['total_criticos']
+        Returns:
+            Dict com métricas agregadas
+        """
+        if not (data_inicio and data_fim):
+            data_inicio = data_fim = None
 
-        cursor.execute("""
-            SELECT COUNT(*) as total_pendentes
-            FROM recomendacoes
-            WHERE status = 'pendente' AND prioridade = 'alta'
-        """)
+        key = (data_inicio, data_fim)
+        versao = self._data_version()
+        cached = self._dash_cache.get(key)
+        if cached and cached[0] == versao:
+            return dict(cached[1])
+
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # Linha agregada fixa: acesso por posição
+
+        if data_inicio:
+            cursor.execute(_DASHBOARD_PERIODO_SQL, (data_inicio, data_fim))
+        else:
+            cursor.execute(_DASHBOARD_SQL)
         
-        metricas['recomendacoes_pendentes'] = cursor.fetchone()['total_pendentes']
+        row = cursor.fetchone()
+        metricas = {
+            'total_notas': row[0],
+            'faturamento_total': row[1] or 0.0,
+            'impostos_totais': row[2] or 0.0,
+            'ticket_medio': row[3] or 0.0,
+            'problemas_criticos': row[4],
+            'recomendacoes_pendentes': row[5],
+        }
+        self._dash_cache[key] = (versao, metricas)
         
-        return metricas
+        return dict(metricas)
     
     def close(self):
         """Fecha conexão com banco de dados"""
         if self.conn:
             self.conn.close()
+            self.conn = None
             logger.info("Conexão com banco fechada")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Instâncias por thread: cada thread tem a sua conexão (e o seu estado de
+# transaction()), e o WAL deixa as leituras seguirem durante uma escrita
+_instances = threading.local()
+
+
+def get_database(db_path: str = "fiscal_data.db") -> FiscalDatabase:
+    """
+    Retorna a instância da thread atual para o caminho informado.
+    
+    Mantém uma conexão aberta por thread (e o cache de páginas do SQLite
+    aquecido) em vez de abrir e fechar o banco a cada requisição. Conexões
+    nunca são compartilhadas entre threads, então uma transaction() aberta
+    em uma thread não suspende nem desfaz as gravações das outras.
+    
+    Args:
+        db_path: Caminho para arquivo do banco SQLite
+    
+    Returns:
+        FiscalDatabase exclusivo da thread atual
+    """
+    por_caminho = getattr(_instances, 'por_caminho', None)
+    if por_caminho is None:
+        por_caminho = _instances.por_caminho = {}
+
+    db = por_caminho.get(db_path)
+    if db is None or db.conn is None:
+        db = FiscalDatabase(db_path)
+        por_caminho[db_path] = db
+    return db
+
 if __name__ == "__main__":
     # Inicializar database
     db = FiscalDatabase("exemplo_fiscal.db")
@@ -822,120 +1319,122 @@ if __name__ == "__main__":
     print("EXEMPLO DE USO DO FISCAL DATABASE")
     print("=" * 80)
     
-    # 1. Simular extração
-    print("\n1️⃣  Salvando extração...")
-    extraction_data = {
-        'identificacao': {
-            'numero_nf': '000.011.334',
-            'serie': '001',
-            'chave_acesso': '35250531152562000346550010000113341000440803',
-            'data_emissao': '2025-05-09'
-        },
-        'emitente': {
-            'cnpj': '31.152.562/0003-46',
-            'razao_social': 'NOBRE COMERCIO',
-            'endereco': {'uf': 'SP'}
-        },
-        'destinatario': {
-            'documento': '529.278.128-29',
-            'tipo_documento': 'CPF',
-            'nome': 'JOAO VITOR',
-            'endereco': {'uf': 'SP'}
-        },
-        'totais': {
-            'valor_total_nf': 259.78,
-            'valor_produtos': 259.78,
-            'valor_icms': 2.72
-        },
-        'produtos': [
-            {
-                'codigo': '90793AB42600',
-                'descricao': 'OLEO YAMALUBE',
-                'ncm': '27101932',
-                'cfop': '5656',
-                'quantidade': 1.0,
-                'valor_unitario': 32.90,
-                'valor_total': 32.90,
-                'impostos': {'icms': 0.0}
+    # 1-3. Gravações agrupadas em uma única transação (um só commit)
+    with db.transaction():
+        # 1. Simular extração
+        print("\n1️⃣  Salvando extração...")
+        extraction_data = {
+            'identificacao': {
+                'numero_nf': '000.011.334',
+                'serie': '001',
+                'chave_acesso': '35250531152562000346550010000113341000440803',
+                'data_emissao': '2025-05-09'
+            },
+            'emitente': {
+                'cnpj': '31.152.562/0003-46',
+                'razao_social': 'NOBRE COMERCIO',
+                'endereco': {'uf': 'SP'}
+            },
+            'destinatario': {
+                'documento': '529.278.128-29',
+                'tipo_documento': 'CPF',
+                'nome': 'JOAO VITOR',
+                'endereco': {'uf': 'SP'}
+            },
+            'totais': {
+                'valor_total_nf': 259.78,
+                'valor_produtos': 259.78,
+                'valor_icms': 2.72
+            },
+            'produtos': [
+                {
+                    'codigo': '90793AB42600',
+                    'descricao': 'OLEO YAMALUBE',
+                    'ncm': '27101932',
+                    'cfop': '5656',
+                    'quantidade': 1.0,
+                    'valor_unitario': 32.90,
+                    'valor_total': 32.90,
+                    'impostos': {'icms': 0.0}
+                }
+            ],
+            'metadata': {
+                'arquivo_processado': '35250531152562000346550010000113341000440803-nfe.pdf',
+                'formato_original': 'pdf',
+                'confianca_extracao': 0.95
             }
-        ],
-        'metadata': {
-            'arquivo_processado': '35250531152562000346550010000113341000440803-nfe.pdf',
-            'formato_original': 'pdf',
-            'confianca_extracao': 0.95
         }
-    }
-    
-    # Por padrão, atualiza se já existe
-    nota_id = db.save_extraction(extraction_data)
-    print(f"   ✅ Nota salva: ID = {nota_id}")
-    
-    # 2. Simular validação
-    print("\n2️⃣  Salvando validação...")
-    validation_data = {
-        'validacao_geral': {
-            'status': 'valido',
-            'score_conformidade': 95.0,
-            'total_erros_criticos': 0,
-            'total_erros': 0,
-            'total_avisos': 1,
-            'apto_para_processamento': True
-        },
-        'analise_risco': {
-            'nivel_risco': 'baixo',
-            'necessita_revisao_manual': False,
-            'necessita_correcao_urgente': False
-        },
-        'problemas': [
-            {
-                'severidade': 'aviso',
-                'categoria': 'tributaria',
-                'campo': 'valor_pis',
-                'descricao': 'PIS não destacado'
+    
+        # Por padrão, atualiza se já existe
+        nota_id = db.save_extraction(extraction_data)
+        print(f"   ✅ Nota salva: ID = {nota_id}")
+    
+        # 2. Simular validação
+        print("\n2️⃣  Salvando validação...")
+        validation_data = {
+            'validacao_geral': {
+                'status': 'valido',
+                'score_conformidade': 95.0,
+                'total_erros_criticos': 0,
+                'total_erros': 0,
+                'total_avisos': 1,
+                'apto_para_processamento': True
+            },
+            'analise_risco': {
+                'nivel_risco': 'baixo',
+                'necessita_revisao_manual': False,
+                'necessita_correcao_urgente': False
+            },
+            'problemas': [
+                {
+                    'severidade': 'aviso',
+                    'categoria': 'tributaria',
+                    'campo': 'valor_pis',
+                    'descricao': 'PIS não destacado'
+                }
+            ],
+            'metadata': {
+                'versao_validador': '2.0',
+                'tempo_processamento_ms': 150
             }
-        ],
-        'metadata': {
-            'versao_validador': '2.0',
-            'tempo_processamento_ms': 150
         }
-    }
-    
-    validacao_id = db.save_validation(nota_id, validation_data)
-    print(f"   ✅ Validação salva: ID = {validacao_id}")
-    
-    # 3. Simular análise contextual
-    print("\n3️⃣  Salvando análise contextual...")
-    analysis_data = {
-        'validacao_geral': {
-            'status': 'com_avisos',
-            'score_conformidade': 90.0
-        },
-        'analise_risco': {
-            'nivel_risco': 'medio'
-        },
-        'oportunidades_fiscais': [
-            {
-                'descricao': 'Crédito PIS/COFINS',
-                'economia_estimada': 1200.0
-            }
-        ],
-        'recomendacoes': [
-            {
-                'prioridade': 'alta',
-                'area': 'tributaria',
-                'acao': 'Solicitar crédito PIS/COFINS',
-                'beneficio_esperado': 'R$ 1.200,00/ano',
-                'prazo_implementacao': 'imediato',
-                'complexidade': 'baixa'
+    
+        validacao_id = db.save_validation(nota_id, validation_data)
+        print(f"   ✅ Validação salva: ID = {validacao_id}")
+    
+        # 3. Simular análise contextual
+        print("\n3️⃣  Salvando análise contextual...")
+        analysis_data = {
+            'validacao_geral': {
+                'status': 'com_avisos',
+                'score_conformidade': 90.0
+            },
+            'analise_risco': {
+                'nivel_risco': 'medio'
+            },
+            'oportunidades_fiscais': [
+                {
+                    'descricao': 'Crédito PIS/COFINS',
+                    'economia_estimada': 1200.0
+                }
+            ],
+            'recomendacoes': [
+                {
+                    'prioridade': 'alta',
+                    'area': 'tributaria',
+                    'acao': 'Solicitar crédito PIS/COFINS',
+                    'beneficio_esperado': 'R$ 1.200,00/ano',
+                    'prazo_implementacao': 'imediato',
+                    'complexidade': 'baixa'
+                }
+            ],
+            'metadata': {
+                'tempo_processamento_ms': 2500
             }
-        ],
-        'metadata': {
-            'tempo_processamento_ms': 2500
         }
-    }
     
-    analise_id = db.save_contextual_analysis(nota_id, analysis_data, validacao_id)
-    print(f"   ✅ Análise contextual salva: ID = {analise_id}")
+        analise_id = db.save_contextual_analysis(nota_id, analysis_data, validacao_id)
+        print(f"   ✅ Análise contextual salva: ID = {analise_id}")
     
     # 4. Buscar nota completa
     print("\n4️⃣  Buscando nota completa...")
@@ -1,44 +1,539 @@
 import logging
+import math
 import re
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from itertools import chain, filterfalse
+from operator import methodcaller, mul
+from types import MappingProxyType
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tabelas de referência (alíquotas 2024-2025), somente leitura e
+# compartilhadas por todas as instâncias do validador.
+_ICMS_INTERNO = MappingProxyType(
+    {
+        'PR': 19.5,
+        'SC': 17.0,
+        'RS': 17.0,
+        'SP': 18.0,
+        'RJ': 20.0,
+        'MG': 18.0,
+        'ES': 17.0,
+        'AC': 19.0,
+        'AM': 20.0,
+        'AP': 18.0,
+        'PA': 19.0,
+        'RO': 19.5,
+        'RR': 20.0,
+        'TO': 20.0,
+        'AL': 19.0,
+        'BA': 20.5,
+        'CE': 20.0,
+        'MA': 23.0,
+        'PB': 20.0,
+        'PE': 20.5,
+        'PI': 22.5,
+        'RN': 20.0,
+        'SE': 18.0,
+        'DF': 20.0,
+        'GO': 19.0,
+        'MT': 17.0,
+        'MS': 17.0,
+        'default': 18.0,
+    }
+)
+_ICMS_INTERNO_DEFAULT = _ICMS_INTERNO['default']
+_ICMS_INTERESTADUAL = MappingProxyType(
+    {'sul_sudeste': 12.0, 'outras_regioes': 7.0}
+)
+_TAX_RATES = MappingProxyType(
+    {
+        'pis_padrao': 1.65,
+        'cofins_padrao': 7.6,
+        'pis_cumulativo': 0.65,
+        'cofins_cumulativo': 3.0,
+        'icms_interno': _ICMS_INTERNO,
+        'icms_interestadual': _ICMS_INTERESTADUAL,
+    }
+)
+_REGIOES = MappingProxyType(
+    {
+        'sul_sudeste': ('PR', 'SC', 'RS', 'SP', 'RJ', 'MG'),
+        'outras_regioes': (
+            'AC',
+            'AM',
+            'AP',
+            'PA',
+            'RO',
+            'RR',
+            'TO',
+            'AL',
+            'BA',
+            'CE',
+            'MA',
+            'PB',
+            'PE',
+            'PI',
+            'RN',
+            'SE',
+            'DF',
+            'GO',
+            'MT',
+            'MS',
+            'ES',
+        ),
+    }
+)
+
+_NUMEROS = '0123456789'
+_LETRAS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Pesos do módulo 11 para os dígitos verificadores de CNPJ e CPF.
+_CNPJ_W1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_CNPJ_W2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_CPF_W1 = tuple(range(10, 1, -1))
+_CPF_W2 = tuple(range(11, 1, -1))
+# Pesos 2..9 aplicados da direita para a esquerda sobre os 43 primeiros
+# dígitos da chave de acesso.
+_CHAVE_W = tuple(2 + (42 - i) % 8 for i in range(43))
+
+# Converte bytes ASCII no valor usado pelo módulo 11 (ord(c) - 48):
+# '0'..'9' viram 0..9 e 'A'..'Z' viram 17..42
+_VALOR_ASCII = bytes((c - 48) % 256 for c in range(256))
+
+# Sequências de dígitos repetidos, que passam no módulo 11 mas são inválidas.
+_CNPJ_REPDIGITS = frozenset(d * 14 for d in _NUMEROS + _LETRAS)
+_CPF_REPDIGITS = frozenset(d * 11 for d in _NUMEROS)
+
+
+class _TabelaTraducao(dict):
+    """Tabela para str.translate que descarta caracteres não mapeados."""
+
+    def __missing__(self, codepoint: int) -> None:
+        # Caracteres fora do Latin-1 não são guardados: a entrada vem de
+        # OCR/LLM e a tabela, compartilhada pelo módulo, cresceria sem limite
+        return None
+
+
+def _tabela_mantendo(mapa: Dict[str, str]) -> _TabelaTraducao:
+    """Cria tabela que traduz os caracteres de mapa e remove os demais."""
+    tabela = _TabelaTraducao(dict.fromkeys(range(256)))
+    tabela.update({ord(k): ord(v) for k, v in mapa.items()})
+    return tabela
+
+
+_DIGITOS = _tabela_mantendo({c: c for c in _NUMEROS})
+# CNPJ alfanumérico: dígitos e letras, minúsculas convertidas em maiúsculas
+_ALFANUMERICOS = _tabela_mantendo(
+    {
+        **{c: c for c in _NUMEROS + _LETRAS},
+        **{c.lower(): c for c in _LETRAS},
+    }
+)
+
+
+def _somente_digitos(valor: Optional[str]) -> str:
+    """Remove tudo que não for dígito; None ou vazio resultam em ''."""
+    return valor.translate(_DIGITOS) if valor else ''
+
+
+def _somente_alfanumericos(valor: Optional[str]) -> str:
+    """Mantém apenas dígitos e letras (em maiúsculas); None resulta em ''."""
+    return valor.translate(_ALFANUMERICOS) if valor else ''
+
+
+# Primeiro dígito do CFOP -> tipo de operação (1-3 entrada, 5-7 saída)
+_TIPO_OPERACAO_CFOP = MappingProxyType(
+    {
+        '1': 'entrada',
+        '2': 'entrada',
+        '3': 'entrada',
+        '5': 'saida',
+        '6': 'saida',
+        '7': 'saida',
+    }
+)
+
+
+_NATUREZA_CFOP = MappingProxyType(
+    {
+        '1': 'entrada_dentro_estado',
+        '2': 'entrada_outros_estados',
+        '3': 'entrada_exterior',
+        '5': 'saida_dentro_estado',
+        '6': 'saida_outros_estados',
+        '7': 'saida_exterior',
+    }
+)
+
+
+@lru_cache(maxsize=1024)
+def _ncm_check(ncm_clean: str) -> Tuple[bool, str]:
+    """Valida um NCM já normalizado (somente dígitos)."""
+    if len(ncm_clean) != 8:
+        return (
+            False,
+            f'NCM deve ter 8 dígitos (encontrado: {len(ncm_clean)})',
+        )
 
-class ValidationError:
-    """Representa um erro de validação"""
+    return True, 'NCM válido'
 
-    def __init__(
-        self,
-        severity: str,
-        category: str,
-        field: str,
-        description: str,
-        current_value: Optional[str] = None,
-        expected_value: Optional[str] = None,
-        suggestion: Optional[str] = None,
-    ):
-        self.severity = severity
-        self.category = category
-        self.field = field
-        self.description = description
-        self.current_value = current_value
-        self.expected_value = expected_value
-        self.suggestion = suggestion
+
+@lru_cache(maxsize=256)
+def _cfop_check(
+    cfop_clean: str,
+) -> Tuple[bool, str, Optional[Tuple[str, str]]]:
+    """
+    Valida e classifica um CFOP já normalizado (somente dígitos).
+
+    Returns:
+        Tupla (válido, mensagem, (tipo_operacao, natureza)); a
+        classificação é None quando o CFOP não tem 4 dígitos
+    """
+    if len(cfop_clean) != 4:
+        return (
+            False,
+            f'CFOP deve ter 4 dígitos (encontrado: {len(cfop_clean)})',
+            None,
+        )
+
+    primeiro_digito = cfop_clean[0]
+    tipo_operacao = _TIPO_OPERACAO_CFOP.get(primeiro_digito)
+
+    if tipo_operacao is None:
+        return (
+            False,
+            f'Primeiro dígito do CFOP inválido: {primeiro_digito}',
+            ('', ''),
+        )
+
+    natureza = _NATUREZA_CFOP[primeiro_digito]
+    return True, 'CFOP válido', (tipo_operacao, natureza)
+
+
+def _tipo_operacao_cfop(cfop: str) -> Optional[str]:
+    """Tipo de operação indicado pelo CFOP, ou None se o CFOP for inválido."""
+    valid, _, classificacao = _cfop_check(_somente_digitos(cfop))
+    return classificacao[0] if valid else None
+
+
+# Penalidade no score de conformidade por ocorrência: (crítico, erro, aviso)
+_PENALIDADES_SCORE = (25, 10, 3)
+
+# (há erros, há avisos) -> (status, apto_para_processamento)
+_STATUS_VALIDACAO = MappingProxyType(
+    {
+        (True, True): ('invalido', False),
+        (True, False): ('invalido', False),
+        (False, True): ('com_avisos', True),
+        (False, False): ('valido', True),
+    }
+)
+
+
+def _score_conformidade(criticos: int, erros: int, avisos: int) -> int:
+    """Score de 0 a 100 descontando as penalidades de cada ocorrência."""
+    penalidade = sum(map(mul, (criticos, erros, avisos), _PENALIDADES_SCORE))
+    return max(0, 100 - penalidade)
+
+
+# Datas YYYY-MM-DD ou DD/MM/YYYY, com os mesmos grupos que o strptime aceita
+# para %Y, %m e %d (mês e dia podem ter um dígito)
+_MES = r'1[0-2]|0[1-9]|[1-9]'
+_DIA = r'3[01]|[12]\d|0[1-9]|[1-9]| [1-9]'
+_DATA_RE = re.compile(
+    rf'(\d{{4}})-({_MES})-({_DIA})|({_DIA})/({_MES})/(\d{{4}})'
+)
+
+# Diferença máxima aceita entre valor calculado e declarado (R$)
+_TOLERANCIA = 0.02
+
+# Alíquotas (%) de PIS e COFINS aceitas: regime cumulativo e não cumulativo
+_ALIQUOTAS_PIS = frozenset(
+    (_TAX_RATES['pis_cumulativo'], _TAX_RATES['pis_padrao'])
+)
+_ALIQUOTAS_COFINS = frozenset(
+    (_TAX_RATES['cofins_cumulativo'], _TAX_RATES['cofins_padrao'])
+)
+
+
+@lru_cache(maxsize=1024)
+def _money_cache(valor: float) -> str:
+    return f'R$ {valor:.2f}'
+
+
+def _money(valor: float) -> str:
+    """Formata valor monetário como 'R$ 0.00', reaproveitando valores repetidos."""
+    # 0.0 e -0.0 têm o mesmo hash; o zero é formatado fora do cache para
+    # manter o sinal
+    if not valor:
+        return f'R$ {valor:.2f}'
+    return _money_cache(valor)
+
+# Valores monetários e quantidades são tratados como inteiros na escala de
+# 4 casas decimais; acima do limite o float não distingue mais essa grade.
+_ESCALA = 10_000
+_LIMITE_EXATO = 1e9
+
+
+def _escalado(valor: float) -> Optional[int]:
+    """valor × 10^4 como inteiro, ou None se valor tiver mais de 4 casas."""
+    if not -_LIMITE_EXATO < valor < _LIMITE_EXATO:
+        return None
+    inteiro = round(valor * _ESCALA)
+    return inteiro if inteiro / _ESCALA == valor else None
+
+
+def _arredondar_produto(a: float, b: float, divisor: int = 1) -> float:
+    """
+    Calcula round(a × b ÷ divisor, 2) em centavos inteiros.
+
+    O resultado é idêntico ao de Decimal(str(a)) * Decimal(str(b)) com
+    arredondamento half-even; valores com mais de 4 casas decimais usam
+    o próprio Decimal.
+
+    Args:
+        a: Primeiro fator
+        b: Segundo fator
+        divisor: Divisor inteiro aplicado ao produto (100 para alíquotas)
+
+    Returns:
+        Produto arredondado para 2 casas decimais
+    """
+    a_int = _escalado(a)
+    b_int = _escalado(b)
+    if a_int is None or b_int is None:
+        return float(round(Decimal(str(a)) * Decimal(str(b)) / divisor, 2))
+
+    # a × b = a_int × b_int / 10^8; em centavos, divide-se por 10^6
+    unidade = _ESCALA * _ESCALA // 100 * divisor
+    centavos, resto = divmod(a_int * b_int, unidade)
+    if 2 * resto > unidade or (2 * resto == unidade and centavos % 2):
+        centavos += 1
+
+    if centavos:
+        return centavos / 100
+    # Preserva o sinal do zero, como o Decimal faz
+    return math.copysign(0.0, a * b)
+
+
+def _linhas_divergentes(
+    quantidades: Tuple[float, ...],
+    unitarios: Tuple[float, ...],
+    totais: Tuple[float, ...],
+) -> List[int]:
+    """
+    Confere quantidade × valor unitário contra o total de todas as linhas.
+
+    Linhas sem nenhum valor positivo são ignoradas.
+
+    Returns:
+        Índices das linhas cujo total diverge além da tolerância
+    """
+    return [
+        i
+        for i, (qtd, val_unit, val_total) in enumerate(
+            zip(quantidades, unitarios, totais)
+        )
+        if (qtd > 0 or val_unit > 0 or val_total > 0)
+        and abs(_arredondar_produto(qtd, val_unit) - val_total) > _TOLERANCIA
+    ]
+
+
+# Campos da chave de acesso e suas posições (início, fim) na chave limpa.
+_CHAVE_CAMPOS = (
+    'uf',
+    'ano_mes',
+    'cnpj',
+    'modelo',
+    'serie',
+    'numero',
+    'tipo_emissao',
+    'codigo',
+    'dv',
+)
+_CHAVE_FATIAS = (
+    (0, 2),
+    (2, 6),
+    (6, 20),
+    (20, 22),
+    (22, 25),
+    (25, 34),
+    (34, 35),
+    (35, 43),
+    (43, 44),
+)
+
+
+def _dv_modulo11(digitos: bytes, pesos: Tuple[int, ...]) -> int:
+    """
+    Calcula um dígito verificador pelo módulo 11.
+
+    Args:
+        digitos: Valores da sequência, um por byte (apenas os primeiros
+            len(pesos) são usados)
+        pesos: Pesos aplicados posição a posição
+
+    Returns:
+        Dígito verificador esperado (0 quando o resto é menor que 2)
+    """
+    remainder = sum(map(mul, digitos, pesos)) % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+@lru_cache(maxsize=8192)
+def _cnpj_check(cnpj_clean: str) -> Tuple[bool, str]:
+    """
+    Valida um CNPJ já normalizado (dígitos e letras maiúsculas).
+
+    No CNPJ alfanumérico cada caractere vale ord(c) - 48, o que mantém
+    o valor dos dígitos; os dígitos verificadores continuam numéricos,
+    então uma letra nessas posições nunca confere com o DV calculado.
+    """
+    if len(cnpj_clean) != 14:
+        return (
+            False,
+            f'CNPJ deve ter 14 dígitos (encontrado: {len(cnpj_clean)})',
+        )
+
+    if cnpj_clean in _CNPJ_REPDIGITS:
+        return False, 'CNPJ com todos os dígitos iguais é inválido'
+
+    digits = cnpj_clean.encode('ascii').translate(_VALOR_ASCII)
+
+    if _dv_modulo11(digits, _CNPJ_W1) != digits[12]:
+        return False, 'Primeiro dígito verificador inválido'
+
+    if _dv_modulo11(digits, _CNPJ_W2) != digits[13]:
+        return False, 'Segundo dígito verificador inválido'
+
+    return True, 'CNPJ válido'
+
+
+@lru_cache(maxsize=8192)
+def _cpf_check(cpf_clean: str) -> Tuple[bool, str]:
+    """Valida um CPF já normalizado (somente dígitos)."""
+    if len(cpf_clean) != 11:
+        return (
+            False,
+            f'CPF deve ter 11 dígitos (encontrado: {len(cpf_clean)})',
+        )
+
+    if cpf_clean in _CPF_REPDIGITS:
+        return False, 'CPF com todos os dígitos iguais é inválido'
+
+    digits = cpf_clean.encode('ascii').translate(_VALOR_ASCII)
+
+    if _dv_modulo11(digits, _CPF_W1) != digits[9]:
+        return False, 'Primeiro dígito verificador inválido'
+
+    if _dv_modulo11(digits, _CPF_W2) != digits[10]:
+        return False, 'Segundo dígito verificador inválido'
+
+    return True, 'CPF válido'
+
+
+@lru_cache(maxsize=8192)
+def _chave_check(chave_clean: str) -> Tuple[bool, str, Tuple[str, ...]]:
+    """
+    Valida uma chave de acesso já normalizada (somente dígitos).
+
+    Retorna as partes da chave como tupla, para que o resultado em cache
+    não possa ser alterado por quem consome os detalhes.
+    """
+    if len(chave_clean) != 44:
+        return (
+            False,
+            f'Chave deve ter 44 dígitos (encontrado: {len(chave_clean)})',
+            (),
+        )
+
+    partes = tuple(chave_clean[i:j] for i, j in _CHAVE_FATIAS)
+
+    digits = chave_clean.encode('ascii').translate(_VALOR_ASCII)
+    expected_dv = _dv_modulo11(digits, _CHAVE_W)
+
+    if digits[43] != expected_dv:
+        return (
+            False,
+            f'Dígito verificador inválido (esperado: {expected_dv})',
+            partes,
+        )
+
+    return True, 'Chave de acesso válida', partes
+
+
+
+def _safe_float(value, default: float = 0.0) -> float:
+    """Converte valor para float, tratando None e strings inválidas."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+@dataclass(slots=True, frozen=True)
+class ProdutosColunas:
+    """
+    Produtos da nota em layout de colunas (uma tupla por campo).
+
+    Os campos numéricos são convertidos uma única vez e todas as
+    validações leem as mesmas colunas.
+    """
+
+    quantidade: Tuple[float, ...]
+    valor_unitario: Tuple[float, ...]
+    valor_total: Tuple[float, ...]
+    ncm: Tuple[Optional[str], ...]
+    cfop: Tuple[Optional[str], ...]
+    descricao: Tuple[Optional[str], ...]
+
+    @classmethod
+    def from_dicts(cls, produtos: List[Dict]) -> 'ProdutosColunas':
+        def coluna(campo: str) -> Tuple:
+            return tuple(map(methodcaller('get', campo), produtos))
+
+        return cls(
+            tuple(map(_safe_float, coluna('quantidade'))),
+            tuple(map(_safe_float, coluna('valor_unitario'))),
+            tuple(map(_safe_float, coluna('valor_total'))),
+            coluna('ncm'),
+            coluna('cfop'),
+            coluna('descricao'),
+        )
+
+    def __len__(self) -> int:
+        return len(self.valor_total)
+
+
+class ValidationError(NamedTuple):
+    """
+    Representa um erro de validação.
+
+    É uma tupla imutável de 7 campos: os validadores acumulam tuplas e o
+    dicionário só é montado por to_dict ao compilar o resultado.
+    """
+
+    severity: str
+    category: str
+    field: str
+    description: str
+    current_value: Optional[str] = None
+    expected_value: Optional[str] = None
+    suggestion: Optional[str] = None
 
     def to_dict(self) -> Dict:
-        return {
-            'severity': self.severity,
-            'category': self.category,
-            'field': self.field,
-            'description': self.description,
-            'current_value': self.current_value,
-            'expected_value': self.expected_value,
-            'suggestion': self.suggestion,
-        }
+        # Mesmo resultado de _asdict, sem a chamada extra por problema
+        return dict(zip(self._fields, self))
 
 
 class FiscalValidator:
@@ -50,71 +545,11 @@ class FiscalValidator:
     def __init__(self):
         self.errors: List[ValidationError] = []
         self.warnings: List[ValidationError] = []
+        # Quantidade de erros por severidade, atualizada em _add
+        self._sev_counts: Dict[str, int] = {}
 
-        self.tax_rates = {
-            'pis_padrao': 1.65,
-            'cofins_padrao': 7.6,
-            'pis_cumulativo': 0.65,
-            'cofins_cumulativo': 3.0,
-            'icms_interno': {
-                'PR': 19.5,
-                'SC': 17.0,
-                'RS': 17.0,
-                'SP': 18.0,
-                'RJ': 20.0,
-                'MG': 18.0,
-                'ES': 17.0,
-                'AC': 19.0,
-                'AM': 20.0,
-                'AP': 18.0,
-                'PA': 19.0,
-                'RO': 19.5,
-                'RR': 20.0,
-                'TO': 20.0,
-                'AL': 19.0,
-                'BA': 20.5,
-                'CE': 20.0,
-                'MA': 23.0,
-                'PB': 20.0,
-                'PE': 20.5,
-                'PI': 22.5,
-                'RN': 20.0,
-                'SE': 18.0,
-                'DF': 20.0,
-                'GO': 19.0,
-                'MT': 17.0,
-                'MS': 17.0,
-                'default': 18.0,
-            },
-            'icms_interestadual': {'sul_sudeste': 12.0, 'outras_regioes': 7.0},
-        }
-
-        self.regioes = {
-            'sul_sudeste': ['PR', 'SC', 'RS', 'SP', 'RJ', 'MG'],
-            'outras_regioes': [
-                'AC',
-                'AM',
-                'AP',
-                'PA',
-                'RO',
-                'RR',
-                'TO',
-                'AL',
-                'BA',
-                'CE',
-                'MA',
-                'PB',
-                'PE',
-                'PI',
-                'RN',
-                'SE',
-                'DF',
-                'GO',
-                'MT',
-                'MS',
-                'ES',
-            ],
-        }
+        self.tax_rates = _TAX_RATES
+        self.regioes = _REGIOES
 
         logger.info(
             'FiscalValidator inicializado com alíquotas atualizadas 2024-2025'
@@ -125,47 +560,16 @@ class FiscalValidator:
         Valida CNPJ usando algoritmo oficial brasileiro.
 
         Args:
-            cnpj: CNPJ para validar (com ou sem formatação)
+            cnpj: CNPJ numérico ou alfanumérico (com ou sem formatação)
 
         Returns:
             Tupla (válido, mensagem)
         """
-        cnpj_clean = re.sub(r'[^0-9]', '', cnpj)
-
+        cnpj_clean = _somente_alfanumericos(cnpj)
         if len(cnpj_clean) != 14:
-            return (
-                False,
-                f'CNPJ deve ter 14 dígitos (encontrado: {len(cnpj_clean)})',
-            )
-
-        if cnpj_clean in [d * 14 for d in '0123456789']:
-            return False, 'CNPJ com todos os dígitos iguais é inválido'
-
-        sum_1 = 0
-        weight_1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-
-        for i in range(12):
-            sum_1 += int(cnpj_clean[i]) * weight_1[i]
-
-        remainder_1 = sum_1 % 11
-        digit_1 = 0 if remainder_1 < 2 else 11 - remainder_1
-
-        if int(cnpj_clean[12]) != digit_1:
-            return False, 'Primeiro dígito verificador inválido'
-
-        sum_2 = 0
-        weight_2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-
-        for i in range(13):
-            sum_2 += int(cnpj_clean[i]) * weight_2[i]
-
-        remainder_2 = sum_2 % 11
-        digit_2 = 0 if remainder_2 < 2 else 11 - remainder_2
-
-        if int(cnpj_clean[13]) != digit_2:
-            return False, 'Segundo dígito verificador inválido'
-
-        return True, 'CNPJ válido'
+            # Texto ao redor de um CNPJ numérico (ex.: 'CNPJ: ...') é ignorado
+            cnpj_clean = _somente_digitos(cnpj)
+        return _cnpj_check(cnpj_clean)
 
     def validate_cpf(self, cpf: str) -> Tuple[bool, str]:
         """
@@ -177,32 +581,7 @@ class FiscalValidator:
         Returns:
             Tupla (válido, mensagem)
         """
-        cpf_clean = re.sub(r'[^0-9]', '', cpf)
-
-        if len(cpf_clean) != 11:
-            return (
-                False,
-                f'CPF deve ter 11 dígitos (encontrado: {len(cpf_clean)})',
-            )
-
-        if cpf_clean in [d * 11 for d in '0123456789']:
-            return False, 'CPF com todos os dígitos iguais é inválido'
-
-        sum_1 = sum(int(cpf_clean[i]) * (10 - i) for i in range(9))
-        remainder_1 = sum_1 % 11
-        digit_1 = 0 if remainder_1 < 2 else 11 - remainder_1
-
-        if int(cpf_clean[9]) != digit_1:
-            return False, 'Primeiro dígito verificador inválido'
-
-        sum_2 = sum(int(cpf_clean[i]) * (11 - i) for i in range(10))
-        remainder_2 = sum_2 % 11
-        digit_2 = 0 if remainder_2 < 2 else 11 - remainder_2
-
-        if int(cpf_clean[10]) != digit_2:
-            return False, 'Segundo dígito verificador inválido'
-
-        return True, 'CPF válido'
+        return _cpf_check(_somente_digitos(cpf))
 
     def validate_chave_acesso(self, chave: str) -> Tuple[bool, str, Dict]:
         """
@@ -217,43 +596,8 @@ class FiscalValidator:
         Returns:
             Tupla (válido, mensagem, detalhes)
         """
-        chave_clean = re.sub(r'[^0-9]', '', chave)
-
-        if len(chave_clean) != 44:
-            return (
-                False,
-                f'Chave deve ter 44 dígitos (encontrado: {len(chave_clean)})',
-                {},
-            )
-
-        details = {
-            'uf': chave_clean[0:2],
-            'ano_mes': chave_clean[2:6],
-            'cnpj': chave_clean[6:20],
-            'modelo': chave_clean[20:22],
-            'serie': chave_clean[22:25],
-            'numero': chave_clean[25:34],
-            'tipo_emissao': chave_clean[34:35],
-            'codigo': chave_clean[35:43],
-            'dv': chave_clean[43:44],
-        }
-
-        weights = list(range(2, 10)) * 5 + [2, 3, 4]
-        sum_calc = sum(
-            int(chave_clean[i]) * weights[42 - i] for i in range(43)
-        )
-
-        remainder = sum_calc % 11
-        expected_dv = 0 if remainder in [0, 1] else 11 - remainder
-
-        if int(details['dv']) != expected_dv:
-            return (
-                False,
-                f'Dígito verificador inválido (esperado: {expected_dv})',
-                details,
-            )
-
-        return True, 'Chave de acesso válida', details
+        valid, msg, partes = _chave_check(_somente_digitos(chave))
+        return valid, msg, dict(zip(_CHAVE_CAMPOS, partes))
 
     def validate_ncm(self, ncm: str) -> Tuple[bool, str]:
         """
@@ -265,15 +609,7 @@ class FiscalValidator:
         Returns:
             Tupla (válido, mensagem)
         """
-        ncm_clean = re.sub(r'[^0-9]', '', ncm) if ncm else ''
-
-        if len(ncm_clean) != 8:
-            return (
-                False,
-                f'NCM deve ter 8 dígitos (encontrado: {len(ncm_clean)})',
-            )
-
-        return True, 'NCM válido'
+        return _ncm_check(_somente_digitos(ncm))
 
     def validate_cfop(self, cfop: str) -> Tuple[bool, str, Dict]:
         """
@@ -285,43 +621,17 @@ class FiscalValidator:
         Returns:
             Tupla (válido, mensagem, detalhes)
         """
-        cfop_clean = re.sub(r'[^0-9]', '', cfop) if cfop else ''
-
-        if len(cfop_clean) != 4:
-            return (
-                False,
-                f'CFOP deve ter 4 dígitos (encontrado: {len(cfop_clean)})',
-                {},
-            )
+        valid, msg, classificacao = _cfop_check(_somente_digitos(cfop))
 
-        primeiro_digito = cfop_clean[0]
+        if classificacao is None:
+            return valid, msg, {}
 
-        details = {'tipo_operacao': '', 'natureza': ''}
-
-        if primeiro_digito in '123':
-            details['tipo_operacao'] = 'entrada'
-            if primeiro_digito == '1':
-                details['natureza'] = 'entrada_dentro_estado'
-            elif primeiro_digito == '2':
-                details['natureza'] = 'entrada_outros_estados'
-            else:
-                details['natureza'] = 'entrada_exterior'
-        elif primeiro_digito in '567':
-            details['tipo_operacao'] = 'saida'
-            if primeiro_digito == '5':
-                details['natureza'] = 'saida_dentro_estado'
-            elif primeiro_digito == '6':
-                details['natureza'] = 'saida_outros_estados'
-            else:
-                details['natureza'] = 'saida_exterior'
-        else:
-            return (
-                False,
-                f'Primeiro dígito do CFOP inválido: {primeiro_digito}',
-                details,
-            )
-
-        return True, 'CFOP válido', details
+        tipo_operacao, natureza = classificacao
+        return (
+            valid,
+            msg,
+            {'tipo_operacao': tipo_operacao, 'natureza': natureza},
+        )
 
     def validate_date_format(
         self, date_str: str, field_name: str
@@ -339,20 +649,21 @@ class FiscalValidator:
         if not date_str:
             return False, f'{field_name} não pode estar vazio'
 
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-            return True, f'{field_name} válida'
-        except ValueError:
-            pass
-
-        try:
-            datetime.strptime(date_str, '%d/%m/%Y')
-            return True, f'{field_name} válida'
-        except ValueError:
-            return (
-                False,
-                f'{field_name} com formato inválido (use YYYY-MM-DD ou DD/MM/YYYY)',
-            )
+        match = _DATA_RE.fullmatch(date_str)
+        if match:
+            ano, mes, dia, dia_br, mes_br, ano_br = match.groups()
+            if ano is None:
+                ano, mes, dia = ano_br, mes_br, dia_br
+            try:
+                date(int(ano), int(mes), int(dia))
+                return True, f'{field_name} válida'
+            except ValueError:
+                pass
+
+        return (
+            False,
+            f'{field_name} com formato inválido (use YYYY-MM-DD ou DD/MM/YYYY)',
+        )
 
     def validate_product_calculation(
         self,
@@ -360,7 +671,7 @@ class FiscalValidator:
         valor_unitario: float,
         valor_total: float,
         produto_desc: str = 'Produto',
-        tolerance: float = 0.02,
+        tolerance: float = _TOLERANCIA,
     ) -> Tuple[bool, str, Dict]:
         """
         Valida cálculo: quantidade × valor_unitario = valor_total.
@@ -379,10 +690,7 @@ class FiscalValidator:
         valor_unitario = self._safe_float(valor_unitario, 0.0)
         valor_total = self._safe_float(valor_total, 0.0)
 
-        expected_total = round(
-            Decimal(str(quantidade)) * Decimal(str(valor_unitario)), 2
-        )
-        expected_total = float(expected_total)
+        expected_total = _arredondar_produto(quantidade, valor_unitario)
 
         difference = abs(expected_total - valor_total)
 
@@ -397,7 +705,7 @@ class FiscalValidator:
         if difference > tolerance:
             return (
                 False,
-                f'{produto_desc}: Valor total incorreto (esperado: R$ {expected_total:.2f}, declarado: R$ {valor_total:.2f})',
+                f'{produto_desc}: Valor total incorreto (esperado: {_money(expected_total)}, declarado: {_money(valor_total)})',
                 details,
             )
 
@@ -414,14 +722,7 @@ class FiscalValidator:
         Returns:
             Float convertido ou valor padrão
         """
-        if value is None:
-            return default
-        if isinstance(value, (int, float)):
-            return float(value)
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return default
+        return _safe_float(value, default)
 
     def validate_tax_calculation(
         self,
@@ -429,7 +730,7 @@ class FiscalValidator:
         aliquota: float,
         valor_imposto: float,
         tipo_imposto: str,
-        tolerance: float = 0.02,
+        tolerance: float = _TOLERANCIA,
     ) -> Tuple[bool, str, Dict]:
         """
         Valida cálculo de imposto: base × (alíquota/100) = valor_imposto.
@@ -462,10 +763,7 @@ class FiscalValidator:
                     {},
                 )
 
-        expected_tax = round(
-            Decimal(str(base_calculo)) * Decimal(str(aliquota)) / 100, 2
-        )
-        expected_tax = float(expected_tax)
+        expected_tax = _arredondar_produto(base_calculo, aliquota, 100)
 
         difference = abs(expected_tax - valor_imposto)
 
@@ -480,7 +778,7 @@ class FiscalValidator:
         if difference > tolerance:
             return (
                 False,
-                f'{tipo_imposto}: Valor incorreto (esperado: R$ {expected_tax:.2f}, declarado: R$ {valor_imposto:.2f})',
+                f'{tipo_imposto}: Valor incorreto (esperado: {_money(expected_tax)}, declarado: {_money(valor_imposto)})',
                 details,
             )
 
@@ -500,18 +798,16 @@ class FiscalValidator:
             Alíquota de ICMS
         """
         if operacao_tipo == 'interno':
-            return self.tax_rates['icms_interno'].get(
-                uf.upper(), self.tax_rates['icms_interno']['default']
-            )
+            return _ICMS_INTERNO.get(uf.upper(), _ICMS_INTERNO_DEFAULT)
         else:
-            return self.tax_rates['icms_interestadual']['sul_sudeste']
+            return _ICMS_INTERESTADUAL['sul_sudeste']
 
     def validate_total_sum(
         self,
         items_total: float,
         declared_total: float,
         field_name: str = 'Total',
-        tolerance: float = 0.02,
+        tolerance: float = _TOLERANCIA,
     ) -> Tuple[bool, str, Dict]:
         """
         Valida soma de totais.
@@ -539,35 +835,55 @@ class FiscalValidator:
         if difference > tolerance:
             return (
                 False,
-                f'{field_name}: Soma incorreta (calculado: R$ {items_total:.2f}, declarado: R$ {declared_total:.2f})',
+                f'{field_name}: Soma incorreta (calculado: {_money(items_total)}, declarado: {_money(declared_total)})',
                 details,
             )
 
         return True, f'{field_name}: Soma correta', details
 
-    def validate_invoice(self, invoice_data: Dict) -> Dict:
+    def validate_invoice(
+        self, invoice_data: Dict, timestamp: Optional[str] = None
+    ) -> Dict:
         """
         Realiza validação completa de uma nota fiscal.
 
         Args:
             invoice_data: Dados da nota fiscal
+            timestamp: Data/hora ISO registrada no resultado (padrão: agora)
 
         Returns:
             Dict com resultado da validação
         """
         self.errors = []
         self.warnings = []
+        self._sev_counts = {}
+
+        if not isinstance(invoice_data, dict):
+            # Fora do formato esperado não há o que validar campo a campo
+            self._add(
+                ValidationError(
+                    'critico',
+                    'estrutura',
+                    'nota_fiscal',
+                    'Dados da nota fiscal ausentes ou em formato inválido',
+                    type(invoice_data).__name__,
+                    'dict',
+                    'Verifique a extração dos dados da nota fiscal',
+                )
+            )
+            return self._compile_validation_result(timestamp)
 
         logger.info('Iniciando validação determinística da nota fiscal')
 
         self._validate_documents(invoice_data)
-        self._validate_fiscal_codes(invoice_data)
-        self._validate_products_calculations(invoice_data)
+        produtos = ProdutosColunas.from_dicts(invoice_data.get('produtos', []))
+
+        soma_produtos = self._validate_produtos(produtos)
         self._validate_tax_calculations(invoice_data)
-        self._validate_totals(invoice_data)
-        self._validate_consistency(invoice_data)
+        self._validate_totals(invoice_data, produtos, soma_produtos)
+        self._validate_consistency(invoice_data, produtos)
 
-        result = self._compile_validation_result()
+        result = self._compile_validation_result(timestamp)
 
         logger.info(
             f'Validação concluída: {len(self.errors)} erros, {len(self.warnings)} avisos'
@@ -575,13 +891,36 @@ class FiscalValidator:
 
         return result
 
+    def validate_invoices(self, invoices: List[Dict]) -> List[Dict]:
+        """
+        Valida um lote de notas fiscais.
+
+        Args:
+            invoices: Lista com os dados das notas fiscais
+
+        Returns:
+            Lista com o resultado da validação de cada nota, na mesma ordem,
+            todos com o timestamp de início do lote
+        """
+        timestamp = datetime.now().isoformat()
+        return [
+            self.validate_invoice(invoice, timestamp) for invoice in invoices
+        ]
+
+    def _add(self, erro: ValidationError) -> None:
+        """Registra um erro e atualiza a contagem da sua severidade."""
+        self.errors.append(erro)
+        self._sev_counts[erro.severity] = (
+            self._sev_counts.get(erro.severity, 0) + 1
+        )
+
     def _validate_documents(self, invoice_data: Dict):
         """Valida documentos (CNPJ, CPF, Chave de Acesso)"""
         emitente = invoice_data.get('emitente', {})
         if emitente.get('cnpj'):
             valid, msg = self.validate_cnpj(emitente['cnpj'])
             if not valid:
-                self.errors.append(
+                self._add(
                     ValidationError(
                         'critico',
                         'documento',
@@ -602,7 +941,7 @@ class FiscalValidator:
         if tipo_doc == 'cnpj' and documento:
             valid, msg = self.validate_cnpj(documento)
             if not valid:
-                self.errors.append(
+                self._add(
                     ValidationError(
                         'critico',
                         'documento',
@@ -616,7 +955,7 @@ class FiscalValidator:
         elif tipo_doc == 'cpf' and documento:
             valid, msg = self.validate_cpf(documento)
             if not valid:
-                self.errors.append(
+                self._add(
                     ValidationError(
                         'erro',
                         'documento',
@@ -628,11 +967,14 @@ class FiscalValidator:
                     )
                 )
         elif documento and not tipo_doc:
-            doc_clean = re.sub(r'[^0-9]', '', documento)
-            if len(doc_clean) == 14:
+            doc_clean = _somente_digitos(documento)
+            if len(doc_clean) == 14 or (
+                len(doc_clean) != 11
+                and len(_somente_alfanumericos(documento)) == 14
+            ):
                 valid, msg = self.validate_cnpj(documento)
                 if not valid:
-                    self.errors.append(
+                    self._add(
                         ValidationError(
                             'critico',
                             'documento',
@@ -646,7 +988,7 @@ class FiscalValidator:
             elif len(doc_clean) == 11:
                 valid, msg = self.validate_cpf(documento)
                 if not valid:
-                    self.errors.append(
+                    self._add(
                         ValidationError(
                             'erro',
                             'documento',
@@ -676,7 +1018,7 @@ class FiscalValidator:
         elif chave:
             valid, msg, details = self.validate_chave_acesso(chave)
             if not valid:
-                self.errors.append(
+                self._add(
                     ValidationError(
                         'critico',
                         'identificacao',
@@ -688,12 +1030,15 @@ class FiscalValidator:
                     )
                 )
 
-    def _validate_fiscal_codes(self, invoice_data: Dict):
-        """Valida códigos fiscais (NCM, CFOP)"""
-        produtos = invoice_data.get('produtos', [])
+    def _validate_produtos(self, produtos: ProdutosColunas) -> float:
+        """
+        Valida códigos fiscais (NCM, CFOP) e cálculos dos produtos em uma
+        única passada.
 
-        for i, produto in enumerate(produtos):
-            ncm = produto.get('ncm')
+        Returns:
+            Soma dos valores totais dos produtos, usada em _validate_totals
+        """
+        for i, (ncm, cfop) in enumerate(zip(produtos.ncm, produtos.cfop)):
             if ncm is None:
                 self.warnings.append(
                     ValidationError(
@@ -707,7 +1052,7 @@ class FiscalValidator:
                     )
                 )
             elif ncm:
-                valid, msg = self.validate_ncm(ncm)
+                valid, msg = _ncm_check(_somente_digitos(ncm))
                 if not valid:
                     self.warnings.append(
                         ValidationError(
@@ -721,7 +1066,6 @@ class FiscalValidator:
                         )
                     )
 
-            cfop = produto.get('cfop')
             if cfop is None:
                 self.warnings.append(
                     ValidationError(
@@ -735,9 +1079,9 @@ class FiscalValidator:
                     )
                 )
             elif cfop:
-                valid, msg, details = self.validate_cfop(cfop)
+                valid, msg, _ = _cfop_check(_somente_digitos(cfop))
                 if not valid:
-                    self.errors.append(
+                    self._add(
                         ValidationError(
                             'erro',
                             'codigo_fiscal',
@@ -749,33 +1093,36 @@ class FiscalValidator:
                         )
                     )
 
-    def _validate_products_calculations(self, invoice_data: Dict):
-        """Valida cálculos dos produtos"""
-        produtos = invoice_data.get('produtos', [])
-
-        for i, produto in enumerate(produtos):
-            qtd = self._safe_float(produto.get('quantidade'), 0.0)
-            val_unit = self._safe_float(produto.get('valor_unitario'), 0.0)
-            val_total = self._safe_float(produto.get('valor_total'), 0.0)
-            desc = produto.get('descricao', f'Produto {i+1}')
-
-            if qtd > 0 or val_unit > 0 or val_total > 0:
-                valid, msg, details = self.validate_product_calculation(
-                    qtd, val_unit, val_total, desc
+        # Erros de cálculo entram depois dos de código fiscal de todos os
+        # produtos; só as linhas divergentes montam mensagem e detalhes
+        for i in _linhas_divergentes(
+            produtos.quantidade, produtos.valor_unitario, produtos.valor_total
+        ):
+            qtd = produtos.quantidade[i]
+            val_unit = produtos.valor_unitario[i]
+            val_total = produtos.valor_total[i]
+            esperado = _arredondar_produto(qtd, val_unit)
+            desc = produtos.descricao[i]
+            if desc is None:
+                desc = f'Produto {i+1}'
+            _, msg, _ = self.validate_product_calculation(
+                qtd, val_unit, val_total, desc
+            )
+            self._add(
+                ValidationError(
+                    'erro',
+                    'calculo',
+                    f'produtos[{i}].valor_total',
+                    msg,
+                    _money(val_total),
+                    _money(esperado),
+                    f'Corrija o valor total para {_money(esperado)}',
                 )
+            )
 
-                if not valid:
-                    self.errors.append(
-                        ValidationError(
-                            'erro',
-                            'calculo',
-                            f'produtos[{i}].valor_total',
-                            msg,
-                            f'R$ {val_total:.2f}',
-                            f"R$ {details['valor_calculado']:.2f}",
-                            f"Corrija o valor total para R$ {details['valor_calculado']:.2f}",
-                        )
-                    )
+        # Soma em C sobre a coluna já convertida; linhas NaN são ignoradas
+        # (como np.nansum) para não anular a conferência dos totais
+        return sum(filterfalse(math.isnan, produtos.valor_total))
 
     def _validate_tax_calculations(self, invoice_data: Dict):
         """Valida cálculos de impostos - VERSÃO CORRIGIDA"""
@@ -791,22 +1138,26 @@ class FiscalValidator:
         )
 
         if base_icms > 0 and valor_icms > 0:
-            aliquota_esperada = self.get_icms_aliquota(uf_emitente, 'interno')
+            aliquota_esperada = _ICMS_INTERNO.get(
+                uf_emitente, _ICMS_INTERNO_DEFAULT
+            )
 
             if aliquota_icms_declarada > 0:
-                valid, msg, details = self.validate_tax_calculation(
-                    base_icms, aliquota_icms_declarada, valor_icms, 'ICMS'
+                esperado = _arredondar_produto(
+                    base_icms, aliquota_icms_declarada, 100
                 )
-
-                if not valid:
-                    self.errors.append(
+                if abs(esperado - valor_icms) > _TOLERANCIA:
+                    _, msg, _ = self.validate_tax_calculation(
+                        base_icms, aliquota_icms_declarada, valor_icms, 'ICMS'
+                    )
+                    self._add(
                         ValidationError(
                             'erro',
                             'imposto',
                             'totais.valor_icms',
                             msg,
-                            f'R$ {valor_icms:.2f}',
-                            f"R$ {details['valor_calculado']:.2f}",
+                            _money(valor_icms),
+                            _money(esperado),
                             f'Verifique o cálculo do ICMS',
                         )
                     )
@@ -824,22 +1175,26 @@ class FiscalValidator:
                         )
                     )
             else:
-                valid, msg, details = self.validate_tax_calculation(
-                    base_icms,
-                    aliquota_esperada,
-                    valor_icms,
-                    f'ICMS (esperado {aliquota_esperada}% para {uf_emitente})',
+                # O rótulo com a alíquota esperada só é formatado se o
+                # cálculo divergir
+                esperado = _arredondar_produto(
+                    base_icms, aliquota_esperada, 100
                 )
-
-                if not valid:
-                    self.errors.append(
+                if abs(esperado - valor_icms) > _TOLERANCIA:
+                    _, msg, _ = self.validate_tax_calculation(
+                        base_icms,
+                        aliquota_esperada,
+                        valor_icms,
+                        f'ICMS (esperado {aliquota_esperada}% para {uf_emitente})',
+                    )
+                    self._add(
                         ValidationError(
                             'erro',
                             'imposto',
                             'totais.valor_icms',
                             msg,
-                            f'R$ {valor_icms:.2f}',
-                            f"R$ {details['valor_calculado']:.2f}",
+                            _money(valor_icms),
+                            _money(esperado),
                             f'Verifique o cálculo do ICMS para {uf_emitente}',
                         )
                     )
@@ -850,26 +1205,26 @@ class FiscalValidator:
 
         if base_pis > 0 and valor_pis > 0:
             if aliquota_pis == 0.0:
-                aliquota_pis = self.tax_rates['pis_padrao']
+                aliquota_pis = _TAX_RATES['pis_padrao']
 
-            valid, msg, details = self.validate_tax_calculation(
-                base_pis, aliquota_pis, valor_pis, 'PIS'
-            )
-
-            if not valid:
-                self.errors.append(
+            esperado = _arredondar_produto(base_pis, aliquota_pis, 100)
+            if abs(esperado - valor_pis) > _TOLERANCIA:
+                _, msg, _ = self.validate_tax_calculation(
+                    base_pis, aliquota_pis, valor_pis, 'PIS'
+                )
+                self._add(
                     ValidationError(
                         'erro',
                         'imposto',
                         'totais.valor_pis',
                         msg,
-                        f'R$ {valor_pis:.2f}',
-                        f"R$ {details['valor_calculado']:.2f}",
+                        _money(valor_pis),
+                        _money(esperado),
                         f'Verifique o cálculo do PIS',
                     )
                 )
 
-            if aliquota_pis not in [0.65, 1.65]:
+            if aliquota_pis not in _ALIQUOTAS_PIS:
                 self.warnings.append(
                     ValidationError(
                         'aviso',
@@ -888,26 +1243,26 @@ class FiscalValidator:
 
         if base_cofins > 0 and valor_cofins > 0:
             if aliquota_cofins == 0.0:
-                aliquota_cofins = self.tax_rates['cofins_padrao']
+                aliquota_cofins = _TAX_RATES['cofins_padrao']
 
-            valid, msg, details = self.validate_tax_calculation(
-                base_cofins, aliquota_cofins, valor_cofins, 'COFINS'
-            )
-
-            if not valid:
-                self.errors.append(
+            esperado = _arredondar_produto(base_cofins, aliquota_cofins, 100)
+            if abs(esperado - valor_cofins) > _TOLERANCIA:
+                _, msg, _ = self.validate_tax_calculation(
+                    base_cofins, aliquota_cofins, valor_cofins, 'COFINS'
+                )
+                self._add(
                     ValidationError(
                         'erro',
                         'imposto',
                         'totais.valor_cofins',
                         msg,
-                        f'R$ {valor_cofins:.2f}',
-                        f"R$ {details['valor_calculado']:.2f}",
+                        _money(valor_cofins),
+                        _money(esperado),
                         'Verifique o cálculo do COFINS',
                     )
                 )
 
-            if aliquota_cofins not in [3.0, 7.6]:
+            if aliquota_cofins not in _ALIQUOTAS_COFINS:
                 self.warnings.append(
                     ValidationError(
                         'aviso',
@@ -920,33 +1275,33 @@ class FiscalValidator:
                     )
                 )
 
-    def _validate_totals(self, invoice_data: Dict):
+    def _validate_totals(
+        self,
+        invoice_data: Dict,
+        produtos: ProdutosColunas,
+        sum_produtos: float,
+    ):
         """Valida totalizadores"""
-        produtos = invoice_data.get('produtos', [])
         totais = invoice_data.get('totais', {})
 
-        sum_produtos = sum(
-            self._safe_float(p.get('valor_total'), 0.0) for p in produtos
-        )
         valor_produtos = self._safe_float(totais.get('valor_produtos'), 0.0)
 
-        if sum_produtos > 0 or valor_produtos > 0:
-            valid, msg, details = self.validate_total_sum(
+        diverge = abs(sum_produtos - valor_produtos) > _TOLERANCIA
+        if diverge and (sum_produtos > 0 or valor_produtos > 0):
+            _, msg, _ = self.validate_total_sum(
                 sum_produtos, valor_produtos, 'Valor dos Produtos'
             )
-
-            if not valid:
-                self.errors.append(
-                    ValidationError(
-                        'erro',
-                        'totalizador',
-                        'totais.valor_produtos',
-                        msg,
-                        f'R$ {valor_produtos:.2f}',
-                        f'R$ {sum_produtos:.2f}',
-                        f'Corrija para R$ {sum_produtos:.2f}',
-                    )
+            self._add(
+                ValidationError(
+                    'erro',
+                    'totalizador',
+                    'totais.valor_produtos',
+                    msg,
+                    _money(valor_produtos),
+                    _money(sum_produtos),
+                    f'Corrija para {_money(sum_produtos)}',
                 )
+            )
 
         if totais.get('valor_produtos') is None and len(produtos) > 0:
             self.warnings.append(
@@ -956,12 +1311,14 @@ class FiscalValidator:
                     'totais.valor_produtos',
                     'Campo valor_produtos está ausente',
                     'None',
-                    f'R$ {sum_produtos:.2f}',
+                    _money(sum_produtos),
                     'Preencha o campo com o valor correto',
                 )
             )
 
-    def _validate_consistency(self, invoice_data: Dict):
+    def _validate_consistency(
+        self, invoice_data: Dict, produtos: ProdutosColunas
+    ):
         """Valida consistências entre campos"""
         identificacao = invoice_data.get('identificacao', {})
         tipo_op = identificacao.get('tipo_operacao')
@@ -982,56 +1339,40 @@ class FiscalValidator:
 
         tipo_op = tipo_op.lower()
 
-        produtos = invoice_data.get('produtos', [])
-        for i, produto in enumerate(produtos):
-            cfop = produto.get('cfop')
-            if cfop:
-                valid, msg, details = self.validate_cfop(cfop)
-                if valid:
-                    cfop_tipo = details.get('tipo_operacao', '')
-                    if cfop_tipo and cfop_tipo != tipo_op:
-                        self.errors.append(
-                            ValidationError(
-                                'erro',
-                                'consistencia',
-                                f'produtos[{i}].cfop',
-                                f'CFOP {cfop} indica {cfop_tipo} mas nota é de {tipo_op}',
-                                cfop,
-                                None,
-                                f'Use CFOP compatível com {tipo_op}',
-                            )
-                        )
+        for i, cfop in enumerate(produtos.cfop):
+            if not cfop:
+                continue
+
+            cfop_tipo = _tipo_operacao_cfop(cfop)
+            if cfop_tipo and cfop_tipo != tipo_op:
+                self._add(
+                    ValidationError(
+                        'erro',
+                        'consistencia',
+                        f'produtos[{i}].cfop',
+                        f'CFOP {cfop} indica {cfop_tipo} mas nota é de {tipo_op}',
+                        cfop,
+                        None,
+                        f'Use CFOP compatível com {tipo_op}',
+                    )
+                )
 
-    def _compile_validation_result(self) -> Dict:
+    def _compile_validation_result(self, timestamp: Optional[str] = None) -> Dict:
         """Compila resultado final da validação"""
-        total_errors = len(
-            [e for e in self.errors if e.severity in ['critico', 'erro']]
-        )
-        total_warnings = len(
-            [e for e in self.errors if e.severity == 'aviso']
-        ) + len(self.warnings)
-        total_critical = len(
-            [e for e in self.errors if e.severity == 'critico']
-        )
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
 
-        score = 100
-        score -= total_critical * 25
-        score -= (total_errors - total_critical) * 10
-        score -= total_warnings * 3
-        score = max(0, score)
-
-        if total_critical > 0:
-            status = 'invalido'
-            apto = False
-        elif total_errors > 0:
-            status = 'invalido'
-            apto = False
-        elif total_warnings > 0:
-            status = 'com_avisos'
-            apto = True
-        else:
-            status = 'valido'
-            apto = True
+        counts = self._sev_counts
+        total_critical = counts.get('critico', 0)
+        total_errors = total_critical + counts.get('erro', 0)
+        total_warnings = counts.get('aviso', 0) + len(self.warnings)
+
+        score = _score_conformidade(
+            total_critical, total_errors - total_critical, total_warnings
+        )
+        status, apto = _STATUS_VALIDACAO[
+            (total_errors > 0, total_warnings > 0)
+        ]
 
         return {
             'validacao_geral': {
@@ -1042,8 +1383,9 @@ class FiscalValidator:
                 'total_avisos': total_warnings,
                 'apto_para_processamento': apto,
             },
-            'problemas': [e.to_dict() for e in self.errors]
-            + [w.to_dict() for w in self.warnings],
-            'timestamp': datetime.now().isoformat(),
+            'problemas': [
+                p.to_dict() for p in chain(self.errors, self.warnings)
+            ],
+            'timestamp': timestamp,
             'validador': 'FiscalValidator v2.0 (Corrigido e Atualizado 2024-2025)',
         }
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class ModeloBase(BaseModel):
+    """
+    Base comum dos schemas de saída dos agentes.
+
+    As instâncias são imutáveis (valores vindos do LLM, só lidos e
+    convertidos com model_dump) e o schema do pydantic-core é montado no
+    primeiro uso, não na importação do módulo.
+    """
+
+    model_config = ConfigDict(frozen=True, defer_build=True)
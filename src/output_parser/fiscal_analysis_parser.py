@@ -1,7 +1,9 @@
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import Field
+
+from .base import ModeloBase
 
 
 class StatusGeral(str, Enum):
@@ -41,7 +43,7 @@ class Prioridade(str, Enum):
     BAIXA = 'baixa'
 
 
-class PrincipaisMetricas(BaseModel):
+class PrincipaisMetricas(ModeloBase):
     faturamento_total: float = 0.0
     impostos_totais: float = 0.0
     carga_tributaria_efetiva: float = 0.0
@@ -50,7 +52,7 @@ class PrincipaisMetricas(BaseModel):
     numero_fornecedores: int = 0
 
 
-class ResumoExecutivo(BaseModel):
+class ResumoExecutivo(ModeloBase):
     periodo_analisado: str
     total_notas: int
     principais_metricas: PrincipaisMetricas
@@ -58,38 +60,38 @@ class ResumoExecutivo(BaseModel):
     principais_insights: List[str] = Field(default_factory=list)
 
 
-class EvolucaoMensal(BaseModel):
+class EvolucaoMensal(ModeloBase):
     mes: str
     valor: float
     variacao_percentual: float
 
 
-class Faturamento(BaseModel):
+class Faturamento(ModeloBase):
     evolucao_mensal: List[EvolucaoMensal] = Field(default_factory=list)
     tendencia: Tendencia
     previsao_proximo_mes: float = 0.0
     sazonalidade_detectada: bool = False
 
 
-class ComposicaoCusto(BaseModel):
+class ComposicaoCusto(ModeloBase):
     categoria: str
     valor: float
     percentual: float
 
 
-class Custos(BaseModel):
+class Custos(ModeloBase):
     composicao: List[ComposicaoCusto] = Field(default_factory=list)
     evolucao: str
     oportunidades_reducao: List[str] = Field(default_factory=list)
 
 
-class ProdutoLucrativo(BaseModel):
+class ProdutoLucrativo(ModeloBase):
     produto: str
     margem: float
     contribuicao: float
 
 
-class Lucratividade(BaseModel):
+class Lucratividade(ModeloBase):
     margem_bruta: float = 0.0
     margem_liquida_estimada: float = 0.0
     produtos_mais_lucrativos: List[ProdutoLucrativo] = Field(
@@ -97,46 +99,46 @@ class Lucratividade(BaseModel):
     )
 
 
-class AnaliseFinanceira(BaseModel):
+class AnaliseFinanceira(ModeloBase):
     faturamento: Faturamento
     custos: Custos
     lucratividade: Lucratividade
 
 
-class DistribuicaoImpostos(BaseModel):
+class DistribuicaoImpostos(ModeloBase):
     icms: float = 0.0
     ipi: float = 0.0
     pis: float = 0.0
     cofins: float = 0.0
 
 
-class CargaTributaria(BaseModel):
+class CargaTributaria(ModeloBase):
     total_impostos: float = 0.0
     percentual_sobre_faturamento: float = 0.0
     distribuicao: DistribuicaoImpostos
     comparacao_setor: str
 
 
-class OportunidadeOtimizacao(BaseModel):
+class OportunidadeOtimizacao(ModeloBase):
     tipo: str
     descricao: str
     economia_potencial: float
     complexidade: Complexidade
 
 
-class Compliance(BaseModel):
+class Compliance(ModeloBase):
     score_medio: float = 0.0
     principais_problemas: List[str] = Field(default_factory=list)
     nivel_risco: NivelRisco
 
 
-class AnaliseTributaria(BaseModel):
+class AnaliseTributaria(ModeloBase):
     carga_tributaria: CargaTributaria
     oportunidades: List[OportunidadeOtimizacao] = Field(default_factory=list)
     compliance: Compliance
 
 
-class Fornecedor(BaseModel):
+class Fornecedor(ModeloBase):
     nome: str
     cnpj: str
     volume_compras: float
@@ -144,43 +146,43 @@ class Fornecedor(BaseModel):
     frequencia: int
 
 
-class ConcentracaoFornecedores(BaseModel):
+class ConcentracaoFornecedores(ModeloBase):
     indice_concentracao: float
     dependencia_principal: float
     risco: NivelRisco
 
 
-class AnaliseFornecedores(BaseModel):
+class AnaliseFornecedores(ModeloBase):
     top_fornecedores: List[Fornecedor] = Field(default_factory=list)
     concentracao: ConcentracaoFornecedores
     oportunidades_negociacao: List[str] = Field(default_factory=list)
 
 
-class ProdutoABC(BaseModel):
+class ProdutoABC(ModeloBase):
     produto: str
     ncm: str
     volume: float
     percentual_faturamento: float
 
 
-class CurvaABC(BaseModel):
+class CurvaABC(ModeloBase):
     classe_a: List[ProdutoABC] = Field(default_factory=list)
     classe_b: List[ProdutoABC] = Field(default_factory=list)
     classe_c: List[ProdutoABC] = Field(default_factory=list)
 
 
-class PerformanceProdutos(BaseModel):
+class PerformanceProdutos(ModeloBase):
     mais_vendidos: List[str] = Field(default_factory=list)
     maior_margem: List[str] = Field(default_factory=list)
     em_declinio: List[str] = Field(default_factory=list)
 
 
-class AnaliseProdutos(BaseModel):
+class AnaliseProdutos(ModeloBase):
     curva_abc: CurvaABC
     performance: PerformanceProdutos
 
 
-class KPIsFinanceiros(BaseModel):
+class KPIsFinanceiros(ModeloBase):
     roi_estimado: float = 0.0
     ebitda_estimado: float = 0.0
     capital_giro_necessario: float = 0.0
@@ -188,18 +190,18 @@ class KPIsFinanceiros(BaseModel):
     prazo_medio_pagamento: int = 0
 
 
-class KPIsOperacionais(BaseModel):
+class KPIsOperacionais(ModeloBase):
     giro_estoque: float = 0.0
     produtividade: float = 0.0
     eficiencia_fiscal: float = 0.0
 
 
-class KPIs(BaseModel):
+class KPIs(ModeloBase):
     financeiros: KPIsFinanceiros
     operacionais: KPIsOperacionais
 
 
-class Alerta(BaseModel):
+class Alerta(ModeloBase):
     tipo: TipoAlerta
     categoria: str
     descricao: str
@@ -207,7 +209,7 @@ class Alerta(BaseModel):
     acao_recomendada: str
 
 
-class Recomendacao(BaseModel):
+class Recomendacao(ModeloBase):
     prioridade: Prioridade
     area: str
     acao: str
@@ -216,7 +218,7 @@ class Recomendacao(BaseModel):
     complexidade: Complexidade
 
 
-class GraficoSugerido(BaseModel):
+class GraficoSugerido(ModeloBase):
     tipo: str
     titulo: str
     descricao: str
@@ -225,19 +227,19 @@ class GraficoSugerido(BaseModel):
     dados_principais: List[str] = Field(default_factory=list)
 
 
-class MetricaDestaque(BaseModel):
+class MetricaDestaque(ModeloBase):
     nome: str
     valor: str
     variacao: str
     status: str
 
 
-class Dashboards(BaseModel):
+class Dashboards(ModeloBase):
     graficos_sugeridos: List[GraficoSugerido] = Field(default_factory=list)
     metricas_destaque: List[MetricaDestaque] = Field(default_factory=list)
 
 
-class MetadataAnalise(BaseModel):
+class MetadataAnalise(ModeloBase):
     data_analise: str
     periodo_dados: str
     total_documentos_analisados: int
@@ -245,7 +247,7 @@ class MetadataAnalise(BaseModel):
     proxima_atualizacao_sugerida: str
 
 
-class FiscalAnalysisResult(BaseModel):
+class FiscalAnalysisResult(ModeloBase):
     """Schema principal para resultado de análise fiscal completa"""
 
     resumo_executivo: ResumoExecutivo
@@ -260,7 +262,7 @@ class FiscalAnalysisResult(BaseModel):
     metadata: MetadataAnalise
 
 
-class ScoreSaudeFiscal(BaseModel):
+class ScoreSaudeFiscal(ModeloBase):
     """Score de saúde fiscal da empresa"""
 
     score_total: float = Field(ge=0.0, le=100.0)
@@ -271,7 +273,7 @@ class ScoreSaudeFiscal(BaseModel):
     evolucao_sugerida: str
 
 
-class ComparacaoPeriodos(BaseModel):
+class ComparacaoPeriodos(ModeloBase):
     """Comparação entre dois períodos"""
 
     variacao_faturamento_percentual: float
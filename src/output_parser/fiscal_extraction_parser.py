@@ -1,9 +1,11 @@
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import Field
 
+from .base import ModeloBase
 
-class Endereco(BaseModel):
+
+class Endereco(ModeloBase):
     logradouro: Optional[str] = None
     numero: Optional[str] = None
     complemento: Optional[str] = None
@@ -13,7 +15,7 @@ class Endereco(BaseModel):
     cep: Optional[str] = None
 
 
-class Identificacao(BaseModel):
+class Identificacao(ModeloBase):
     numero_nf: Optional[str] = None
     serie: Optional[str] = None
     data_emissao: Optional[str] = None
@@ -22,7 +24,7 @@ class Identificacao(BaseModel):
     natureza_operacao: Optional[str] = None
 
 
-class Emitente(BaseModel):
+class Emitente(ModeloBase):
     cnpj: Optional[str] = None
     razao_social: Optional[str] = None
     nome_fantasia: Optional[str] = None
@@ -30,7 +32,7 @@ class Emitente(BaseModel):
     endereco: Optional[Endereco] = None
 
 
-class Destinatario(BaseModel):
+class Destinatario(ModeloBase):
     documento: Optional[str] = None
     tipo_documento: Optional[str] = None
     nome: Optional[str] = None
@@ -38,14 +40,14 @@ class Destinatario(BaseModel):
     endereco: Optional[Endereco] = None
 
 
-class Impostos(BaseModel):
+class Impostos(ModeloBase):
     icms: Optional[float] = 0.0
     ipi: Optional[float] = 0.0
     pis: Optional[float] = 0.0
     cofins: Optional[float] = 0.0
 
 
-class Produto(BaseModel):
+class Produto(ModeloBase):
     codigo: Optional[str] = None
     descricao: Optional[str] = None
     ncm: Optional[str] = None
@@ -57,7 +59,7 @@ class Produto(BaseModel):
     impostos: Optional[Impostos] = Field(default_factory=Impostos)
 
 
-class Totais(BaseModel):
+class Totais(ModeloBase):
     valor_produtos: Optional[float] = 0.0
     valor_total_nf: Optional[float] = 0.0
     base_calculo_icms: Optional[float] = 0.0
@@ -73,14 +75,14 @@ class Totais(BaseModel):
     valor_outros: Optional[float] = 0.0
 
 
-class InformacoesAdicionais(BaseModel):
+class InformacoesAdicionais(ModeloBase):
     informacoes_complementares: Optional[str] = None
     observacoes_fiscais: Optional[str] = None
     forma_pagamento: Optional[str] = None
     transportadora: Optional[str] = None
 
 
-class Metadata(BaseModel):
+class Metadata(ModeloBase):
     tipo_documento: Optional[str] = None
     formato_original: Optional[str] = None
     confianca_extracao: Optional[float] = Field(default=0.0, ge=0.0, le=1.0)
@@ -88,7 +90,7 @@ class Metadata(BaseModel):
     arquivo_processado: Optional[str] = None
 
 
-class NotaFiscalExtract(BaseModel):
+class NotaFiscalExtract(ModeloBase):
     """Schema principal para extração de dados de Nota Fiscal"""
 
     identificacao: Identificacao
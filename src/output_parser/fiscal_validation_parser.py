@@ -4,7 +4,9 @@ Modelos Pydantic para validação de notas fiscais.
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import Field
+
+from .base import ModeloBase
 
 
 class StatusValidacao(str, Enum):
@@ -27,27 +29,27 @@ class NivelRisco(str, Enum):
     CRITICO = 'critico'
 
 
-class ValidacaoDocumento(BaseModel):
+class ValidacaoDocumento(ModeloBase):
     campo: str
     valor: str
     valido: bool
     mensagem: str
 
 
-class ValidacaoChaveAcesso(BaseModel):
+class ValidacaoChaveAcesso(ModeloBase):
     valida: bool
     estrutura_correta: bool
     digito_verificador_correto: bool
     detalhes: str
 
 
-class ValidacoesEstruturais(BaseModel):
+class ValidacoesEstruturais(ModeloBase):
     documentos: List[ValidacaoDocumento] = Field(default_factory=list)
     codigos_fiscais: List[ValidacaoDocumento] = Field(default_factory=list)
     chave_acesso: Optional[ValidacaoChaveAcesso] = None
 
 
-class CalculoProduto(BaseModel):
+class CalculoProduto(ModeloBase):
     produto: str
     calculo_correto: bool
     valor_esperado: float
@@ -55,60 +57,60 @@ class CalculoProduto(BaseModel):
     diferenca: float
 
 
-class CalculoImposto(BaseModel):
+class CalculoImposto(ModeloBase):
     correto: bool
     valor_calculado: float
     valor_declarado: float
     diferenca: float
 
 
-class CalculosImpostos(BaseModel):
+class CalculosImpostos(ModeloBase):
     icms: Optional[CalculoImposto] = None
     ipi: Optional[CalculoImposto] = None
     pis: Optional[CalculoImposto] = None
     cofins: Optional[CalculoImposto] = None
 
 
-class Totalizadores(BaseModel):
+class Totalizadores(ModeloBase):
     produtos_correto: bool
     total_nf_correto: bool
     detalhes: str
 
 
-class ValidacoesMatematicas(BaseModel):
+class ValidacoesMatematicas(ModeloBase):
     calculos_produtos: List[CalculoProduto] = Field(default_factory=list)
     calculos_impostos: Optional[CalculosImpostos] = None
     totalizadores: Optional[Totalizadores] = None
 
 
-class CFOPOperacao(BaseModel):
+class CFOPOperacao(ModeloBase):
     compativel: bool
     cfop: str
     tipo_operacao: str
     observacao: Optional[str] = None
 
 
-class OperacaoInterestadual(BaseModel):
+class OperacaoInterestadual(ModeloBase):
     aplicavel: bool
     aliquota_correta: bool
     difal_calculado: bool
     observacoes: Optional[str] = None
 
 
-class SubstituicaoTributaria(BaseModel):
+class SubstituicaoTributaria(ModeloBase):
     aplicavel: bool
     calculo_correto: bool
     mva_aplicada: Optional[float] = None
     observacoes: Optional[str] = None
 
 
-class ValidacoesFiscais(BaseModel):
+class ValidacoesFiscais(ModeloBase):
     cfop_operacao: Optional[CFOPOperacao] = None
     operacao_interestadual: Optional[OperacaoInterestadual] = None
     substituicao_tributaria: Optional[SubstituicaoTributaria] = None
 
 
-class Problema(BaseModel):
+class Problema(ModeloBase):
     severidade: Severidade
     categoria: str
     campo: str
@@ -119,7 +121,7 @@ class Problema(BaseModel):
     impacto_fiscal: Optional[str] = None
 
 
-class AnaliseRisco(BaseModel):
+class AnaliseRisco(ModeloBase):
     nivel_risco: NivelRisco
     principais_riscos: List[str] = Field(default_factory=list)
     recomendacoes: List[str] = Field(default_factory=list)
@@ -127,7 +129,7 @@ class AnaliseRisco(BaseModel):
     necessita_correcao_urgente: bool = False
 
 
-class ValidacaoGeral(BaseModel):
+class ValidacaoGeral(ModeloBase):
     status: StatusValidacao
     score_conformidade: float = Field(ge=0.0, le=100.0)
     total_erros_criticos: int = 0
@@ -136,7 +138,7 @@ class ValidacaoGeral(BaseModel):
     apto_para_processamento: bool = False
 
 
-class MetadataValidacao(BaseModel):
+class MetadataValidacao(ModeloBase):
     timestamp_validacao: str
     tempo_processamento_ms: Optional[int] = None
     versao_validador: str = '1.0.0'
@@ -144,7 +146,7 @@ class MetadataValidacao(BaseModel):
     alertas_suprimidos: Optional[int] = None
 
 
-class NotaFiscalValidation(BaseModel):
+class NotaFiscalValidation(ModeloBase):
     """Schema principal para resultado de validação de Nota Fiscal"""
 
     validacao_geral: ValidacaoGeral
@@ -0,0 +1,87 @@
+import json
+import math
+import sqlite3
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fiscal_database import FiscalDatabase, get_database  # noqa: E402
+
+
+class FiscalDatabaseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = FiscalDatabase(os.path.join(self.tmpdir.name, 'teste.db'))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def salvar_nota(self, numero: str, data_emissao: str, **totais) -> int:
+        return self.db.save_extraction({
+            'identificacao': {
+                'numero_nf': numero,
+                'chave_acesso': f'chave-{numero}',
+                'data_emissao': data_emissao,
+            },
+            'totais': totais,
+            'produtos': [],
+        })
+
+
+class TestNotasPorPeriodoJson(FiscalDatabaseTestCase):
+    def test_json_igual_a_lista_com_reais_exatos_e_infinitos(self):
+        self.salvar_nota('1', '2024-01-01', valor_total_nf=0.1 + 0.2, valor_icms=1 / 3)
+        self.salvar_nota('2', '2024-01-02', valor_total_nf=math.inf)
+        self.salvar_nota('3', '2024-01-03', valor_total_nf=-math.inf, valor_pis=None)
+
+        lista = self.db.get_notas_por_periodo('2024-01-01', '2024-12-31')
+        via_json = json.loads(
+            self.db.get_notas_por_periodo_json('2024-01-01', '2024-12-31')
+        )
+
+        self.assertEqual(via_json, lista)
+        valores = {nota['numero_nf']: nota['valor_total_nf'] for nota in via_json}
+        self.assertEqual(valores, {'1': 0.1 + 0.2, '2': math.inf, '3': -math.inf})
+
+
+class TestDashboardCache(FiscalDatabaseTestCase):
+    def test_escrita_em_outra_thread_invalida_cache(self):
+        self.salvar_nota('1', '2024-01-01', valor_total_nf=10.0)
+        self.assertEqual(self.db.get_dashboard_data()['total_notas'], 1)
+
+        def salvar_em_outra_thread():
+            outro = get_database(self.db.db_path)
+            outro.save_extraction({
+                'identificacao': {'numero_nf': '2', 'chave_acesso': 'chave-2'},
+                'produtos': [],
+            })
+            outro.close()
+
+        thread = threading.Thread(target=salvar_em_outra_thread)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(self.db.get_dashboard_data()['total_notas'], 2)
+
+
+class TestSchemaVersion(FiscalDatabaseTestCase):
+    def test_banco_mais_novo_mantem_user_version(self):
+        self.db.close()
+        conn = sqlite3.connect(self.db.db_path)
+        conn.execute('PRAGMA user_version = 99')
+        conn.close()
+
+        with self.assertLogs('fiscal_database', level='WARNING'):
+            self.db = FiscalDatabase(self.db.db_path)
+
+        versao = self.db.conn.execute('PRAGMA user_version').fetchone()[0]
+        self.assertEqual(versao, 99)
+
+
+if __name__ == '__main__':
+    unittest.main()
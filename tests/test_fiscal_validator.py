@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fiscal_validator import FiscalValidator  # noqa: E402
+
+
+class TestValidateInvoiceEntrada(unittest.TestCase):
+    def setUp(self):
+        self.validator = FiscalValidator()
+
+    def test_dict_vazio_segue_validacao_normal(self):
+        resultado = self.validator.validate_invoice({})
+
+        self.assertEqual(
+            resultado['validacao_geral'],
+            {
+                'status': 'com_avisos',
+                'score_conformidade': 94,
+                'total_erros_criticos': 0,
+                'total_erros': 0,
+                'total_avisos': 2,
+                'apto_para_processamento': True,
+            },
+        )
+
+    def test_entrada_que_nao_e_dict_gera_erro_critico(self):
+        for entrada in (None, [], 'nota'):
+            with self.subTest(entrada=entrada):
+                resultado = self.validator.validate_invoice(entrada)
+
+                self.assertEqual(resultado['validacao_geral']['status'], 'invalido')
+                self.assertEqual(
+                    [(p['severity'], p['category']) for p in resultado['problemas']],
+                    [('critico', 'estrutura')],
+                )
+
+
+class TestValidateConsistency(unittest.TestCase):
+    def setUp(self):
+        self.validator = FiscalValidator()
+
+    def test_tipo_operacao_nao_reconhecido_gera_erro_por_produto(self):
+        resultado = self.validator.validate_invoice({
+            'identificacao': {'tipo_operacao': '0 - Entrada'},
+            'produtos': [{'cfop': '5102'}, {'cfop': '1102'}, {'cfop': ''}],
+        })
+
+        consistencia = [
+            p for p in resultado['problemas'] if p['category'] == 'consistencia'
+        ]
+        self.assertEqual(
+            [p['field'] for p in consistencia],
+            ['produtos[0].cfop', 'produtos[1].cfop'],
+        )
+        self.assertEqual(
+            [p['severity'] for p in consistencia], ['erro', 'erro']
+        )
+        self.assertFalse(
+            any(p['field'] == 'identificacao.tipo_operacao'
+                for p in resultado['problemas'])
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()